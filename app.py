@@ -1,10 +1,15 @@
+import hashlib
+import os
+from collections import OrderedDict
+from io import BytesIO
+from typing import List, Optional
 import streamlit as st
 import pandas as pd
-import json
-import xml.etree.ElementTree as ET
-from io import BytesIO, StringIO
-from packer import Item, Bin, Packer
-from visualizer import visualize_bin
+from importer import import_file
+from cache import PlanCache
+from jobs import PackJob
+from packer import Item, BinType, Packer, RepackReport
+from visualizer import BATCH_THRESHOLD, bin_thumbnail, visualize_bin
 import plotly.graph_objects as go
 
 # Set page config
@@ -199,196 +204,152 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# ─────────────────────────────────────────────────────
-# FILE PARSING UTILITIES
-# ─────────────────────────────────────────────────────
+# Rows shown in the import previews
+PREVIEW_ROWS = 1000
 
-def parse_csv(file) -> pd.DataFrame:
-    """Parse CSV file with auto-detection of separator."""
-    content = file.read().decode('utf-8')
-    # Try comma first, then semicolon
-    for sep in [',', ';', '\t']:
-        try:
-            df = pd.read_csv(StringIO(content), sep=sep)
-            if len(df.columns) >= 3:
-                return df
-        except Exception:
-            continue
-    return pd.read_csv(StringIO(content))
 
+@st.cache_data(max_entries=8, show_spinner="Reading file...")
+def load_import(digest: str, fmt: str, kind: str, _content: bytes) -> tuple:
+    """import_file on uploaded bytes, cached by content digest and format.
 
-def parse_excel(file) -> pd.DataFrame:
-    """Parse Excel (.xlsx / .xls) file."""
-    return pd.read_excel(file, engine='openpyxl')
+    Reruns triggered by other widgets reuse the parsed and validated table.
+    """
+    file = BytesIO(_content)
+    file.name = f"upload{fmt}"
+    return import_file(file, kind)
 
 
-def parse_xml(file) -> pd.DataFrame:
-    """Parse XML file. Expects <items><item> or <bins><bin> structure."""
-    content = file.read().decode('utf-8')
-    root = ET.fromstring(content)
-    
-    records = []
-    # Try to find child elements (item, bin, row, record, etc.)
-    for child in root:
-        record = {}
-        for field in child:
-            tag = field.tag.strip().lower()
-            text = field.text.strip() if field.text else ''
-            # Try numeric conversion
-            try:
-                record[tag] = float(text)
-                if record[tag] == int(record[tag]):
-                    record[tag] = int(record[tag])
-            except (ValueError, TypeError):
-                record[tag] = text
-        if record:
-            records.append(record)
-    
-    return pd.DataFrame(records)
-
-
-def parse_json(file) -> pd.DataFrame:
-    """Parse JSON file. Expects a list of objects."""
-    content = file.read().decode('utf-8')
-    data = json.loads(content)
-    if isinstance(data, list):
-        return pd.DataFrame(data)
-    elif isinstance(data, dict):
-        # Check for common wrapper keys
-        for key in ['items', 'bins', 'data', 'records']:
-            if key in data and isinstance(data[key], list):
-                return pd.DataFrame(data[key])
-        return pd.DataFrame([data])
-    return pd.DataFrame()
-
-
-def parse_uploaded_file(file) -> pd.DataFrame:
-    """Route to correct parser based on file extension."""
-    name = file.name.lower()
-    if name.endswith('.csv'):
-        return parse_csv(file)
-    elif name.endswith(('.xlsx', '.xls')):
-        return parse_excel(file)
-    elif name.endswith('.xml'):
-        return parse_xml(file)
-    elif name.endswith('.json'):
-        return parse_json(file)
-    else:
-        raise ValueError(f"Unsupported file format: {name}")
+def import_upload(uploaded, kind: str) -> tuple:
+    content = uploaded.getvalue()
+    fmt = os.path.splitext(uploaded.name)[1].lower()
+    return load_import(hashlib.sha256(content).hexdigest(), fmt, kind, content)
 
 
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Normalize column names to expected format.
-    
-    Uses keyword-contains matching so columns like 'Width_cm', 
-    'Height_mm', 'Depth_in', 'item_name' are all correctly detected.
-    Priority order ensures exact matches win over partial matches.
+def session_table(key: str) -> pd.DataFrame:
+    """DataFrame view of a record list in session_state, rebuilt only when the list changes."""
+    records = st.session_state[key]
+    # The lists are only ever replaced or grown, so identity and length tell a change
+    stamp = (id(records), len(records))
+    cached = st.session_state.get(f'_{key}_table')
+    if cached is None or cached[0] != stamp:
+        cached = (stamp, pd.DataFrame(records))
+        st.session_state[f'_{key}_table'] = cached
+    return cached[1]
+
+
+# Thumbnails per row in the results overview, and 3D figures kept per session
+THUMBNAILS_PER_ROW = 6
+FIGURE_CACHE_SIZE = 4
+
+
+def bin_figure(packer: Packer, index: int, lod: bool, merge: bool):
+    """visualize_bin for one bin, memoized in session_state (least recently used evicted).
+
+    The memo is cleared whenever a new result is stored, since ids of freed
+    packers are reused.
     """
-    # Define mapping rules: (target_name, exact_matches, contains_keywords)
-    rules = [
-        ('name', 
-         {'name', 'item_name', 'item', 'isim', 'ad', 'ürün', 'urun', 'adi', 'adı', 'product', 'label'},
-         ['name', 'item', 'isim', 'ürün', 'urun', 'product', 'label', 'adi', 'adı']),
-        ('w',    
-         {'w', 'width', 'genişlik', 'genislik', 'en'},
-         ['width', 'genişlik', 'genislik']),
-        ('h',    
-         {'h', 'height', 'yükseklik', 'yukseklik', 'boy'},
-         ['height', 'yükseklik', 'yukseklik']),
-        ('d',    
-         {'d', 'depth', 'derinlik', 'uzunluk', 'length'},
-         ['depth', 'derinlik', 'uzunluk', 'length']),
-        ('qty',  
-         {'qty', 'quantity', 'count', 'adet', 'miktar', 'sayi', 'sayı'},
-         ['qty', 'quantity', 'count', 'adet', 'miktar', 'sayi', 'sayı']),
-        ('weight',
-         {'weight', 'agirlik', 'ağırlık'},
-         ['weight', 'agirlik', 'ağırlık']),
-    ]
-    
-    col_map = {}
-    mapped_targets = set()  # Prevent duplicate mappings
-    
-    # Pass 1: Exact matches (highest priority)
-    for col in df.columns:
-        lower = col.strip().lower()
-        for target, exact_set, _ in rules:
-            if target not in mapped_targets and lower in exact_set:
-                col_map[col] = target
-                mapped_targets.add(target)
-                break
-    
-    # Pass 2: Contains-keyword matches (for remaining unmapped columns)
-    for col in df.columns:
-        if col in col_map:
-            continue
-        lower = col.strip().lower()
-        # Remove common suffixes/units for cleaner matching
-        cleaned = lower.replace('_', ' ').replace('-', ' ')
-        for target, _, keywords in rules:
-            if target not in mapped_targets:
-                for kw in keywords:
-                    if kw in cleaned:
-                        col_map[col] = target
-                        mapped_targets.add(target)
-                        break
-                if col in col_map:
-                    break
-    
-    df = df.rename(columns=col_map)
-    return df
+    figures = st.session_state.setdefault('_figures', OrderedDict())
+    key = (id(packer), index, lod, merge)
+    if key in figures:
+        figures.move_to_end(key)
+        return figures[key]
+    fig = visualize_bin(packer.bins[index], lod=lod, merge=merge, color_by='name' if merge else 'index')
+    figures[key] = fig
+    while len(figures) > FIGURE_CACHE_SIZE:
+        figures.popitem(last=False)
+    return fig
+
+
+def bin_thumb(packer: Packer, index: int):
+    """bin_thumbnail for one bin, memoized in session_state like bin_figure.
+
+    Expander bodies run on every rerun even when collapsed, so without it
+    each widget click would redraw every thumbnail.
+    """
+    thumbnails = st.session_state.setdefault('_thumbnails', {})
+    key = (id(packer), index)
+    if key not in thumbnails:
+        thumbnails[key] = bin_thumbnail(packer.bins[index])
+    return thumbnails[key]
 
 
-def validate_items_df(df: pd.DataFrame) -> tuple:
-    """Validate DataFrame for item import. Returns (is_valid, message, cleaned_df)."""
-    required = ['w', 'h', 'd']
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        return False, f"Missing required columns: {', '.join(missing)}. Found: {', '.join(df.columns)}", df
-    
-    # Add defaults
-    if 'name' not in df.columns:
-        df['name'] = [f"Item {i+1}" for i in range(len(df))]
-    if 'qty' not in df.columns:
-        df['qty'] = 1
-    
-    # Convert to numeric
-    for col in ['w', 'h', 'd', 'qty']:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    # Drop rows with NaN in critical columns
-    before = len(df)
-    df = df.dropna(subset=['w', 'h', 'd'])
-    dropped = before - len(df)
-    
-    df['qty'] = df['qty'].fillna(1).astype(int)
-    
-    msg = f"✅ {len(df)} items ready to import."
-    if dropped > 0:
-        msg += f" ({dropped} rows skipped due to invalid data)"
-    
-    return True, msg, df
+def clear_figures():
+    """Drop the memoized figures and thumbnails when a new result is stored."""
+    st.session_state.pop('_figures', None)
+    st.session_state.pop('_thumbnails', None)
 
 
-def validate_bins_df(df: pd.DataFrame) -> tuple:
-    """Validate DataFrame for bin import. Returns (is_valid, message, cleaned_df)."""
-    required = ['w', 'h', 'd']
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        return False, f"Missing required columns: {', '.join(missing)}. Found: {', '.join(df.columns)}", df
-    
-    for col in ['w', 'h', 'd']:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    before = len(df)
-    df = df.dropna(subset=['w', 'h', 'd'])
-    dropped = before - len(df)
-    
-    msg = f"✅ {len(df)} containers ready to import."
-    if dropped > 0:
-        msg += f" ({dropped} rows skipped due to invalid data)"
-    
-    return True, msg, df
+def inventory(records: list) -> Optional[dict]:
+    """Item quantities by name, with each name's dimensions and limits; None when a name has two specs."""
+    counts = {}
+    for record in records:
+        spec = (record['w'], record['h'], record['d'], record.get('weight', 0),
+                record.get('max_load', 0), bool(record.get('fragile', False)))
+        known = counts.setdefault(record['name'], [spec, 0])
+        if known[0] != spec:
+            return None
+        known[1] += int(record['qty'])
+    return counts
+
+
+def update_plan(packer: Packer, before: dict, after: dict) -> Optional[List[RepackReport]]:
+    """Bring a packed result from one inventory to the next in place; None if it needs a full run.
+
+    Only quantity changes, new names and dropped names are applied
+    incrementally; a name whose dimensions or limits changed means a new run.
+    """
+    if any(name in after and after[name][0] != spec for name, (spec, _) in before.items()):
+        return None
+    reports = []
+    for name, (spec, qty) in before.items():
+        if after.get(name, (spec, 0))[1] != qty:
+            reports.append(packer.change_quantity(name, after.get(name, (spec, 0))[1]))
+    added = [Item(name, *spec) for name, (spec, qty) in after.items() if name not in before for _ in range(qty)]
+    if added:
+        reports.append(packer.add_items(added))
+    return reports
+
+
+@st.fragment(run_every=0.5)
+def job_progress():
+    """Progress of the running packing job; reruns on its own until the job ends."""
+    job = st.session_state.get('job')
+    if job is None:
+        return
+    # Keeps the job alive; without it (page closed) the job cancels itself
+    job.heartbeat()
+    if job.done:
+        del st.session_state.job
+        if job.error is not None:
+            st.session_state.pack_error = str(job.error)
+        else:
+            # Kept across reruns, so other widgets do not clear the results
+            st.session_state.packed = (job.packer, job.result)
+            # Figures are keyed by id(packer), which a new packer may reuse
+            clear_figures()
+        st.rerun()
+
+    current = f" · filling {job.current_bin.name}" if job.current_bin is not None else ""
+    st.progress(job.fraction, text=f"⏳ Packing... {job.placed:,} / {job.total:,} items{current} · {job.elapsed:.0f} s")
+    # Bins so far; first fit may still add to any bin that is not complete
+    bins = [b for b in list(job.packer.bins) if b.items]
+    completed = {id(b) for b in job.completed_bins()}
+    if bins:
+        st.caption(f"{len(bins)} bins opened, {len(completed)} complete")
+        st.dataframe(pd.DataFrame([{
+            'Bin': b.name,
+            'Status': '✅ complete' if id(b) in completed else '⏳ filling',
+            'Items': len(b.items),
+            'Utilization %': round(b.used_volume / b.get_volume() * 100, 1) if b.get_volume() > 0 else 0.0,
+        } for b in bins]), use_container_width=True, hide_index=True, height=min(300, 38 + 35 * len(bins)))
+    if st.button("⏹️ Cancel", key='btn_cancel_job'):
+        job.cancel()
+
+
+@st.cache_resource
+def get_plan_cache() -> PlanCache:
+    """Packing results shared by all sessions; PACKER_CACHE_DIR persists them on disk."""
+    return PlanCache(max_entries=128, path=os.environ.get('PACKER_CACHE_DIR'))
 
 
 # ─────────────────────────────────────────────────────
@@ -470,7 +431,7 @@ with st.expander("📁 **Import Data from File** (CSV, Excel, XML, JSON)", expan
     ">
         <strong>📝 Expected Columns:</strong><br>
         <b>Items:</b> <code>name</code>, <code>w</code> (width), <code>h</code> (height), <code>d</code> (depth), <code>qty</code> (quantity)<br>
-        <b>Containers:</b> <code>w</code>, <code>h</code>, <code>d</code><br>
+        <b>Containers:</b> <code>w</code>, <code>h</code>, <code>d</code>, optional <code>qty</code> (max. instances, blank = unlimited)<br>
         <em style="color: #7A8599;">Column names are flexible — Turkish names like 'genişlik', 'yükseklik', 'adet' also work.</em>
     </div>
     """, unsafe_allow_html=True)
@@ -488,13 +449,14 @@ with st.expander("📁 **Import Data from File** (CSV, Excel, XML, JSON)", expan
         
         if items_file is not None:
             try:
-                df = parse_uploaded_file(items_file)
-                df = normalize_columns(df)
-                is_valid, msg, df = validate_items_df(df)
+                # Parsed once per file content, then served from the cache on reruns
+                is_valid, msg, df = import_upload(items_file, 'items')
                 
                 if is_valid:
                     st.success(msg)
-                    st.dataframe(df, use_container_width=True, height=200)
+                    st.dataframe(df.head(PREVIEW_ROWS), use_container_width=True, height=200)
+                    if len(df) > PREVIEW_ROWS:
+                        st.caption(f"Showing the first {PREVIEW_ROWS:,} of {len(df):,} rows.")
                     
                     import_mode = st.radio(
                         "Import mode:",
@@ -504,7 +466,10 @@ with st.expander("📁 **Import Data from File** (CSV, Excel, XML, JSON)", expan
                     )
                     
                     if st.button("✅ Import Items", key="btn_import_items", use_container_width=True):
-                        new_items = df[['name', 'w', 'h', 'd', 'qty']].to_dict('records')
+                        # Weight and stacking limits come along when the file has them
+                        item_cols = ['name', 'w', 'h', 'd', 'qty'] + [
+                            c for c in ('weight', 'max_load', 'fragile') if c in df.columns]
+                        new_items = df[item_cols].to_dict('records')
                         if import_mode == "Replace all items":
                             st.session_state.cargo_items = new_items
                         else:
@@ -513,7 +478,7 @@ with st.expander("📁 **Import Data from File** (CSV, Excel, XML, JSON)", expan
                         st.rerun()
                 else:
                     st.error(msg)
-                    st.dataframe(df, use_container_width=True)
+                    st.dataframe(df.head(PREVIEW_ROWS), use_container_width=True)
             except Exception as e:
                 st.error(f"❌ Error parsing file: {e}")
     
@@ -528,13 +493,12 @@ with st.expander("📁 **Import Data from File** (CSV, Excel, XML, JSON)", expan
         
         if bins_file is not None:
             try:
-                df = parse_uploaded_file(bins_file)
-                df = normalize_columns(df)
-                is_valid, msg, df = validate_bins_df(df)
+                is_valid, msg, df = import_upload(bins_file, 'bins')
                 
                 if is_valid:
+                    bin_cols = ['w', 'h', 'd'] + (['qty'] if 'qty' in df.columns else [])
                     st.success(msg)
-                    st.dataframe(df[['w', 'h', 'd']], use_container_width=True, height=200)
+                    st.dataframe(df[bin_cols], use_container_width=True, height=200)
                     
                     import_mode = st.radio(
                         "Import mode:",
@@ -544,7 +508,7 @@ with st.expander("📁 **Import Data from File** (CSV, Excel, XML, JSON)", expan
                     )
                     
                     if st.button("✅ Import Containers", key="btn_import_bins", use_container_width=True):
-                        new_bins = df[['w', 'h', 'd']].to_dict('records')
+                        new_bins = df[bin_cols].to_dict('records')
                         if import_mode == "Replace all bins":
                             st.session_state.bins = new_bins
                         else:
@@ -569,7 +533,7 @@ with col_left:
     st.subheader("📋 Inventory")
     if st.session_state.cargo_items:
         try:
-            df = pd.DataFrame(st.session_state.cargo_items)
+            df = session_table('cargo_items')
             st.dataframe(df, use_container_width=True)
         except Exception as e:
             st.error(f"Error displaying items: {e}")
@@ -581,64 +545,146 @@ with col_left:
     if not st.session_state.bins:
         st.info(f"Using default bin: {bin_w} × {bin_h} × {bin_d}")
     else:
-        st.dataframe(pd.DataFrame(st.session_state.bins), use_container_width=True)
+        st.dataframe(session_table('bins'), use_container_width=True)
 
     pack_btn = st.button("🚀 RUN OPTIMIZATION", use_container_width=True)
 
 with col_right:
+    inputs = None
     if pack_btn:
-        packer = Packer()
-        
-        bin_sources = st.session_state.bins if st.session_state.bins else [{"w": bin_w, "h": bin_h, "d": bin_d}]
+        inputs = ([dict(b) for b in st.session_state.bins] or [(bin_w, bin_h, bin_d)],
+                  inventory(st.session_state.cargo_items))
+        previous = st.session_state.get('packed_inputs')
+        packed = st.session_state.get('packed')
+        # A few changed lines update the plan on screen instead of packing anew
+        if (packed is not None and previous is not None and 'job' not in st.session_state
+                and not packed[0].cancelled and previous[0] == inputs[0]
+                and previous[1] is not None and inputs[1] is not None):
+            reports = update_plan(packed[0], previous[1], inputs[1])
+            if reports is not None:
+                st.session_state.packed = (packed[0], False)
+                st.session_state.packed_inputs = inputs
+                st.session_state.repack = reports
+                # Figures of the old placements are stale
+                clear_figures()
+                pack_btn = False
+
+    if pack_btn:
+        packer = Packer(stats=True)
         
+        # Container types: bins are opened on demand, only as many as the load needs
         if not st.session_state.bins:
-             for i in range(5):
-                 packer.add_bin(Bin(f"Bin {i+1}", bin_w, bin_h, bin_d))
+             packer.add_bin_type(BinType("Bin", bin_w, bin_h, bin_d))
         else:
              for i, b in enumerate(st.session_state.bins):
-                 packer.add_bin(Bin(f"Bin {i+1}", b['w'], b['h'], b['d']))
+                 limit = b.get('qty')
+                 limit = int(limit) if limit is not None and pd.notna(limit) else None
+                 packer.add_bin_type(BinType(f"Type {i+1}", b['w'], b['h'], b['d'], limit=limit))
 
         # Add Items
         for item in st.session_state.cargo_items:
             for _ in range(item['qty']):
-                packer.add_item(Item(item['name'], item['w'], item['h'], item['d']))
+                packer.add_item(Item(item['name'], item['w'], item['h'], item['d'], item.get('weight', 0),
+                                     item.get('max_load', 0), bool(item.get('fragile', False))))
         
-        # Pack
-        packer.pack(bigger_first=True)
+        # Pack on a background thread (a repeated instance comes straight
+        # from the plan cache); a new run replaces any job still going
+        if 'job' in st.session_state:
+            st.session_state.job.cancel()
+        cache = get_plan_cache()
+        st.session_state.job = PackJob(packer, lambda p: cache.pack(p, bigger_first=True)).start()
+        st.session_state.pop('packed', None)
+        st.session_state.pop('pack_error', None)
+        st.session_state.pop('repack', None)
+        st.session_state.packed_inputs = inputs
+
+    if 'job' in st.session_state:
+        job_progress()
+    if 'pack_error' in st.session_state:
+        st.error(f"❌ Packing failed: {st.session_state.pack_error}")
+
+    if 'packed' in st.session_state:
+        packer, cached = st.session_state.packed
         
         # Display Results
         st.subheader("📊 Packing Results")
+        if cached:
+            st.caption("⚡ Loaded from the plan cache.")
+        if 'repack' in st.session_state:
+            reports = st.session_state.repack
+            st.caption(f"✏️ Plan updated in place: {sum(len(r.placed) for r in reports):,} placed, "
+                       f"{sum(len(r.removed) for r in reports):,} removed, "
+                       f"{sum(len(r.moved) for r in reports):,} moved, "
+                       f"{sum(r.bins_touched for r in reports):,} bins touched.")
+        if packer.cancelled:
+            placed = sum(len(b.items) for b in packer.bins)
+            st.warning(f"⏹️ Packing was cancelled: {placed:,} of {len(packer.items):,} items placed.")
         
         # Display Unfitted Items globally
         if packer.unfit_items:
              st.error(f"⚠️ {len(packer.unfit_items)} items could not be packed into any bin.")
              with st.expander("Show Unfitted Items"):
                  st.dataframe(pd.DataFrame([{'Name': i.name, 'Vol': i.get_volume()} for i in packer.unfit_items]))
+
+        # Search counters and timings from the run
+        with st.expander("⏱️ Packing Statistics"):
+            stats = packer.stats.to_dict()
+            s1, s2, s3, s4 = st.columns(4)
+            s1.metric("Pack Time", f"{stats['total_time'] * 1000:,.0f} ms")
+            s2.metric("Pivots Tried", f"{stats['pivots_tried']:,}")
+            s3.metric("Rotations Tried", f"{stats['rotations_tried']:,}")
+            s4.metric("Intersection Tests", f"{stats['intersect_calls']:,}")
+            st.json(stats, expanded=False)
+            st.download_button("⬇️ Download Stats (JSON)", packer.stats.to_json(indent=2),
+                               file_name="pack_stats.json", mime="application/json")
         
         if not packer.bins:
             st.warning("No bins created.")
         else:
-            tabs = st.tabs([f"📦 {b.name}" for b in packer.bins])
-            
-            for i, bin_obj in enumerate(packer.bins):
-                with tabs[i]:
-                    # Stats
-                    total_vol = bin_obj.get_volume()
-                    packed_vol = sum([it.get_volume() for it in bin_obj.items])
-                    efficiency = (packed_vol / total_vol) * 100 if total_vol > 0 else 0
-                    
-                    c1, c2, c3 = st.columns(3)
-                    c1.metric("📦 Items Packed", len(bin_obj.items))
-                    c2.metric("📈 Volume Utilization", f"{efficiency:.1f}%")
-                    c3.metric("📐 Bin Volume", f"{total_vol:,.0f}")
-                    
-                    # Visualization
-                    if len(bin_obj.items) > 0:
-                        fig = visualize_bin(bin_obj)
-                        st.plotly_chart(fig, use_container_width=True)
-                    else:
-                        st.info("Bin is empty.")
-    else:
+            # Large bins show their outer shell by default; enclosed cartons are hidden
+            v1, v2 = st.columns(2)
+            show_all = v1.toggle("🔍 Show all items", value=False,
+                                 help=f"Draw every item, including those fully enclosed by others (bins over {BATCH_THRESHOLD} items)")
+            merge_same = v2.toggle("🧱 Merge identical neighbours", value=False, disabled=show_all,
+                                    help="Draw adjacent cartons of the same item as one block")
+
+            # Lightweight overview of every bin; the 3D figure is only built
+            # for the one selected below
+            summary = pd.DataFrame([{
+                'Bin': b.name,
+                'Items': len(b.items),
+                'Utilization %': round(b.used_volume / b.get_volume() * 100, 1) if b.get_volume() > 0 else 0.0,
+                'Weight': b.get_total_weight(),
+                'Volume': b.get_volume(),
+            } for b in packer.bins])
+            st.dataframe(summary, use_container_width=True, hide_index=True,
+                         height=min(400, 38 + 35 * len(summary)))
+
+            with st.expander("🗺️ Top-view thumbnails", expanded=len(packer.bins) <= THUMBNAILS_PER_ROW):
+                for row in range(0, len(packer.bins), THUMBNAILS_PER_ROW):
+                    thumb_cols = st.columns(THUMBNAILS_PER_ROW)
+                    for col, k, util in zip(thumb_cols, range(row, min(row + THUMBNAILS_PER_ROW, len(packer.bins))),
+                                            summary['Utilization %'][row:row + THUMBNAILS_PER_ROW]):
+                        col.image(bin_thumb(packer, k), caption=f"{packer.bins[k].name} · {util:.0f}%",
+                                  use_container_width=True)
+
+            selected = st.selectbox("📦 Show bin", range(len(packer.bins)),
+                                    format_func=lambda i: f"{packer.bins[i].name} ({len(packer.bins[i].items)} items)")
+            bin_obj = packer.bins[selected]
+
+            c1, c2, c3 = st.columns(3)
+            c1.metric("📦 Items Packed", len(bin_obj.items))
+            c2.metric("📈 Volume Utilization", f"{summary['Utilization %'][selected]:.1f}%")
+            c3.metric("📐 Bin Volume", f"{bin_obj.get_volume():,.0f}")
+
+            # Visualization
+            if len(bin_obj.items) > 0:
+                lod = not show_all and len(bin_obj.items) > BATCH_THRESHOLD
+                fig = bin_figure(packer, selected, lod=lod, merge=merge_same)
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.info("Bin is empty.")
+    elif 'job' not in st.session_state and 'pack_error' not in st.session_state:
         # Show placeholder when no optimization has run
         st.markdown("""
         <div style="
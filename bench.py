@@ -0,0 +1,211 @@
+"""Reproducible packing benchmarks.
+
+Generates standard 3D bin packing instance families, packs each with
+Packer.pack, and records wall time, peak memory, bins used and volume
+utilization in a JSON file. With --compare, flags regressions against a
+stored baseline and exits with status 1.
+
+    python bench.py --sizes 100 1000 --out bench_results.json
+    python bench.py --families BR1 MPV5 --sizes 1000 10000 --compare baseline.json
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import sys
+import time
+from typing import List, Tuple
+
+from cli import parse_option
+from packer import BinType, Item, Packer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Bischoff & Ratcliff: 587 x 233 x 220 container, BR1..BR15 differ by the number
+# of box types (weakly to strongly heterogeneous)
+BR_CONTAINER = (587, 233, 220)
+BR_TYPES = {f'BR{k}': n for k, n in enumerate([3, 5, 8, 10, 12, 15, 20, 30, 40, 50, 60, 70, 80, 90, 100], 1)}
+
+# Martello, Pisinger & Vigo classes 1-5 mix five item types in a 100^3 bin
+# (60% of the class's own type, 10% of each other); 6-8 are uniform classes
+MPV_CLASSES = [f'MPV{k}' for k in range(1, 9)]
+
+DEFAULT_FAMILIES = ['BR1', 'BR7', 'BR15', 'MPV1', 'MPV5', 'MPV7']
+DEFAULT_SIZES = [100, 1000]
+
+
+def br_instance(family: str, size: int, seed: int) -> Tuple[Tuple[float, float, float], List[tuple]]:
+    rng = random.Random(f'{family}-{size}-{seed}')
+    types = []
+    for _ in range(BR_TYPES[family]):
+        types.append((rng.randint(30, 120), rng.randint(25, 100), rng.randint(20, 80), rng.randint(1, 50)))
+    items = []
+    for k in range(size):
+        w, h, d, weight = types[rng.randrange(len(types))] if k >= len(types) else types[k]
+        items.append((f'T{types.index((w, h, d, weight))}', w, h, d, weight))
+    return BR_CONTAINER, items
+
+
+def _mpv_item(rng: random.Random, kind: int, W: int) -> Tuple[int, int, int]:
+    half, two_thirds = W // 2, 2 * W // 3
+    if kind == 1:
+        return rng.randint(1, half), rng.randint(two_thirds, W), rng.randint(two_thirds, W)
+    if kind == 2:
+        return rng.randint(two_thirds, W), rng.randint(1, half), rng.randint(two_thirds, W)
+    if kind == 3:
+        return rng.randint(two_thirds, W), rng.randint(two_thirds, W), rng.randint(1, half)
+    if kind == 4:
+        return rng.randint(half, W), rng.randint(half, W), rng.randint(half, W)
+    return rng.randint(1, half), rng.randint(1, half), rng.randint(1, half)
+
+
+def mpv_instance(family: str, size: int, seed: int) -> Tuple[Tuple[float, float, float], List[tuple]]:
+    rng = random.Random(f'{family}-{size}-{seed}')
+    cls = int(family[3:])
+    if cls <= 5:
+        W = 100
+        dims = []
+        for _ in range(size):
+            r = rng.random()
+            kind = cls if r < 0.6 else [k for k in range(1, 6) if k != cls][min(int((r - 0.6) / 0.1), 3)]
+            dims.append(_mpv_item(rng, kind, W))
+    else:
+        W, top = {6: (10, 10), 7: (40, 35), 8: (100, 100)}[cls]
+        dims = [(rng.randint(1, top), rng.randint(1, top), rng.randint(1, top)) for _ in range(size)]
+    return (W, W, W), [(f'I{k}', w, h, d, 0) for k, (w, h, d) in enumerate(dims)]
+
+
+def make_instance(family: str, size: int, seed: int):
+    if family in BR_TYPES:
+        return br_instance(family, size, seed)
+    if family in MPV_CLASSES:
+        return mpv_instance(family, size, seed)
+    raise ValueError(f"Unknown instance family: {family}")
+
+
+def _peak_rss_kb() -> int:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_case(family: str, size: int, seed: int, pack_options: dict) -> dict:
+    """Build and pack one instance; runs in a fresh process for clean memory numbers."""
+    (W, H, D), specs = make_instance(family, size, seed)
+    rss_before = _peak_rss_kb() if resource else None
+
+    packer = Packer()
+    packer.add_bin_type(BinType(family, W, H, D))
+    for name, w, h, d, weight in specs:
+        packer.add_item(Item(name, w, h, d, weight))
+
+    start = time.perf_counter()
+    packer.pack(**pack_options)
+    elapsed = time.perf_counter() - start
+
+    used = [b for b in packer.bins if b.items]
+    used_volume = sum(b.get_volume() for b in used)
+    return {
+        'family': family,
+        'size': size,
+        'seed': seed,
+        'time_s': round(elapsed, 4),
+        'peak_mem_kb': _peak_rss_kb() - rss_before if resource else None,
+        'bins_used': len(used),
+        'lower_bound': packer.lower_bound,
+        'utilization': round(sum(b.used_volume for b in used) / used_volume, 4) if used_volume else 0,
+        'unfit': len(packer.unfit_items),
+    }
+
+
+def run_suite(families: List[str], sizes: List[int], seeds: List[int], pack_options: dict) -> dict:
+    results = []
+    ctx = multiprocessing.get_context('spawn')
+    for family in families:
+        for size in sizes:
+            for seed in seeds:
+                with ctx.Pool(processes=1, maxtasksperchild=1) as pool:
+                    result = pool.apply(run_case, (family, size, seed, pack_options))
+                print(f"{family:>5} n={size:<6} seed={seed} {result['time_s']:>9.3f}s "
+                      f"bins={result['bins_used']} (lb {result['lower_bound']}) "
+                      f"util={result['utilization']:.3f} unfit={result['unfit']}", file=sys.stderr)
+                results.append(result)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pack_options': pack_options,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(current: dict, baseline: dict, time_tolerance: float = 0.25, memory_tolerance: float = 0.25) -> List[str]:
+    """Return one message per regression of current against baseline."""
+    def key(r):
+        return (r['family'], r['size'], r['seed'])
+
+    previous = {key(r): r for r in baseline['results']}
+    regressions = []
+    for r in current['results']:
+        old = previous.get(key(r))
+        if old is None:
+            continue
+        label = f"{r['family']} n={r['size']} seed={r['seed']}"
+        if r['time_s'] > old['time_s'] * (1 + time_tolerance) and r['time_s'] - old['time_s'] > 0.05:
+            regressions.append(f"{label}: time {old['time_s']:.3f}s -> {r['time_s']:.3f}s")
+        if r['peak_mem_kb'] and old.get('peak_mem_kb') and r['peak_mem_kb'] > old['peak_mem_kb'] * (1 + memory_tolerance) \
+                and r['peak_mem_kb'] - old['peak_mem_kb'] > 1024:
+            regressions.append(f"{label}: peak memory {old['peak_mem_kb']} KB -> {r['peak_mem_kb']} KB")
+        if r['bins_used'] > old['bins_used']:
+            regressions.append(f"{label}: bins used {old['bins_used']} -> {r['bins_used']}")
+        if r['unfit'] > old['unfit']:
+            regressions.append(f"{label}: unfit items {old['unfit']} -> {r['unfit']}")
+        if r['utilization'] < old['utilization'] - 0.005:
+            regressions.append(f"{label}: utilization {old['utilization']:.3f} -> {r['utilization']:.3f}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Packer.pack on standard instance families.")
+    parser.add_argument('--families', nargs='+', default=DEFAULT_FAMILIES,
+                        help=f"BR1..BR15 and/or MPV1..MPV8 (default: {' '.join(DEFAULT_FAMILIES)})")
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES, help="Item counts per instance")
+    parser.add_argument('--seeds', nargs='+', type=int, default=[0], help="Instance seeds")
+    parser.add_argument('--option', action='append', default=[], metavar='KEY=VALUE',
+                        help="Extra Packer.pack keyword argument, e.g. --option block_building=true")
+    parser.add_argument('--out', default='bench_results.json', help="Where to write the results")
+    parser.add_argument('--compare', metavar='BASELINE', help="Baseline results file to check for regressions")
+    parser.add_argument('--time-tolerance', type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument('--memory-tolerance', type=float, default=0.25, help="Allowed relative memory growth")
+    args = parser.parse_args(argv)
+
+    for family in args.families:
+        if family not in BR_TYPES and family not in MPV_CLASSES:
+            parser.error(f"unknown family {family}")
+
+    pack_options = dict(parse_option(o) for o in args.option)
+    current = run_suite(args.families, args.sizes, args.seeds, pack_options)
+    with open(args.out, 'w') as f:
+        json.dump(current, f, indent=2)
+    print(f"Results written to {args.out}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.time_tolerance, args.memory_tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import math
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import List, Sequence
+
+# Lower bounds on the number of bins needed for a set of items. Containers are
+# anything with width/height/depth/max_weight (Bin or BinType); with several
+# container sizes the bounds use one relaxed container that is at least as
+# large as each of them along every axis, which keeps them valid.
+
+
+def packable(items: Sequence, containers: Sequence) -> List:
+    """Items that fit on their own into at least one container."""
+    result = []
+    for item in items:
+        for c in containers:
+            if c.max_weight > 0 and item.weight > c.max_weight:
+                continue
+            if any(d[0] <= c.width and d[1] <= c.height and d[2] <= c.depth for _, d in item.orientations):
+                result.append(item)
+                break
+    return result
+
+
+def volume_bound(items: Sequence, containers: Sequence) -> int:
+    """Continuous bound: total item volume over the largest container volume."""
+    capacity = max(c.width * c.height * c.depth for c in containers)
+    return math.ceil(sum(i.get_volume() for i in items) / capacity - 1e-9)
+
+
+def weight_bound(items: Sequence, containers: Sequence) -> int:
+    """Continuous bound on weight; 0 if any container has no weight limit."""
+    if any(c.max_weight <= 0 for c in containers):
+        return 0
+    capacity = max(c.max_weight for c in containers)
+    return math.ceil(sum(i.weight for i in items) / capacity - 1e-9)
+
+
+def _l2_1d(sizes: List[float], capacity: float) -> int:
+    # Martello-Toth L2 bound for 1D bin packing of sizes into bins of capacity
+    if not sizes:
+        return 0
+    sizes = sorted(sizes)
+    prefix = [0] + list(accumulate(sizes))
+    half = capacity / 2
+    best = 0
+    for p in [0] + [s for s in sizes if s <= half]:
+        # J1: s > C - p, J2: C/2 < s <= C - p, J3: p <= s <= C/2
+        j1 = len(sizes) - bisect_right(sizes, capacity - p)
+        lo2, hi2 = bisect_right(sizes, half), bisect_right(sizes, capacity - p)
+        lo3, hi3 = bisect_left(sizes, p), bisect_right(sizes, half)
+        j2 = hi2 - lo2
+        room = j2 * capacity - (prefix[hi2] - prefix[lo2])
+        extra = math.ceil(((prefix[hi3] - prefix[lo3]) - room) / capacity - 1e-9)
+        best = max(best, j1 + j2 + max(0, extra))
+    return best
+
+
+def dimension_bound(items: Sequence, containers: Sequence) -> int:
+    """Martello-Pisinger-Vigo style L1 bound, adapted to rotatable items.
+
+    For each pair of axes (a, b), items that exceed half the container along
+    both a and b in every orientation can never sit side by side in that
+    plane, so they stack along the third axis c. Their smallest possible
+    extent along c then forms a 1D bin packing instance, bounded with L2.
+    """
+    size = (max(c.width for c in containers),
+            max(c.height for c in containers),
+            max(c.depth for c in containers))
+    best = 0
+    for a, b, c in ((0, 1, 2), (0, 2, 1), (1, 2, 0)):
+        stacked = []
+        for item in items:
+            dims = [d for _, d in item.orientations]
+            if all(d[a] > size[a] / 2 and d[b] > size[b] / 2 for d in dims):
+                stacked.append(min(d[c] for d in dims))
+        best = max(best, _l2_1d(stacked, size[c]))
+    return best
+
+
+def lower_bound(items: Sequence, containers: Sequence) -> int:
+    """Best of the volume, weight and dimension bounds for the packable items."""
+    items = packable(items, containers)
+    if not items:
+        return 0
+    return max(1, volume_bound(items, containers), weight_bound(items, containers),
+               dimension_bound(items, containers))
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from packer import Item, Packer
+
+
+def canonical_items(packer: Packer) -> List[Item]:
+    """The packer's items in a canonical order: by dimensions, weight and load limits, names ignored.
+
+    Plans are cached against this order, so the same mix of items matches
+    however it was entered.
+    """
+    return sorted(packer.items, key=lambda i: (i.width, i.height, i.depth, i.weight, i.max_load, i.fragile))
+
+
+def instance_key(packer: Packer, pack_options: dict) -> str:
+    """Content hash of a packing instance: items, containers and pack options."""
+    items = []
+    for item in canonical_items(packer):
+        spec = [item.width, item.height, item.depth, item.weight, item.max_load, item.fragile]
+        if items and items[-1][0] == spec:
+            items[-1][1] += 1
+        else:
+            items.append([spec, 1])
+    instance = {
+        'items': items,
+        'bins': [[b.name, b.width, b.height, b.depth, b.max_weight] for b in packer.bins],
+        'bin_types': [[t.name, t.width, t.height, t.depth, t.max_weight, t.limit] for t in packer.bin_types],
+        'options': pack_options,
+    }
+    text = json.dumps(instance, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class PlanCache:
+    """Packing results keyed by instance_key, in an LRU of at most max_entries.
+
+    With a path, entries are also written there as one JSON file each and
+    read back on a memory miss, so they survive restarts. Safe to share
+    between threads.
+    """
+    def __init__(self, max_entries: int = 256, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        entry = self._load(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, entry: dict):
+        self._remember(key, entry)
+        if self.path:
+            # Write then rename, so a reader never sees a half-written file
+            target = self._file(key)
+            tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp, target)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def pack(self, packer: Packer, **pack_options) -> bool:
+        """Packer.pack through the cache. Returns True when the plan came from the cache.
+
+        On a hit the cached plan is applied to the packer without searching.
+        """
+        key = instance_key(packer, pack_options)
+        items = canonical_items(packer)
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+            packer._record_options(**pack_options)
+            packer.apply_plan(entry['plan'], items)
+            packer.lower_bound = entry['lower_bound']
+            packer._unpackable = entry['unpackable']
+            return True
+
+        self.misses += 1
+        packer.pack(**pack_options)
+        if packer.cancelled:
+            # Partial result, not worth keeping
+            return False
+        self.put(key, {
+            'plan': packer.export_plan(items),
+            'lower_bound': packer.lower_bound,
+            'unpackable': packer._unpackable,
+        })
+        return False
+
+    def _remember(self, key: str, entry: dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.json")
+
+    def _load(self, key: str) -> Optional[dict]:
+        if not self.path:
+            return None
+        try:
+            with open(self._file(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
@@ -0,0 +1,268 @@
+"""Headless batch packing, no Streamlit needed.
+
+Reads orders as JSONL (one order object per line) or CSV (one item per row,
+rows of an order grouped by an order id column), packs each order and writes
+one JSON result line per order as soon as it is done. Orders are read lazily
+and at most a few per worker are in flight, so memory stays flat however
+long the input is.
+
+    python cli.py orders.jsonl --out plans.jsonl --workers 8
+    python cli.py orders.csv --bin 120x80x80 --bin 100x60x50:4
+    cat orders.jsonl | python cli.py - --bins containers.csv
+
+A JSONL order looks like
+    {"order": "A-17", "items": [{"name": "Box", "w": 20, "h": 10, "d": 30, "qty": 4}],
+     "bins": [{"w": 120, "h": 80, "d": 80}]}
+Item and bin records accept the same column names as the file import of the
+app. Orders without "bins" use the --bin / --bins containers.
+"""
+import argparse
+import csv
+import itertools
+import json
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterator, List, Optional, TextIO, Tuple
+
+import pandas as pd
+
+from importer import import_file, normalize_columns, validate_bins_df, validate_items_df
+from packer import BinType, Item, Packer
+
+# Column names recognised as the order id of a CSV row
+ORDER_COLUMNS = ('order', 'order_id', 'shipment', 'shipment_id', 'sipariş', 'siparis')
+
+
+def read_jsonl(stream: TextIO) -> Iterator[dict]:
+    """Yield orders from a JSONL stream, skipping blank lines."""
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            order = json.loads(line)
+        except ValueError as e:
+            yield {'order': f"line {number}", 'error': f"Invalid JSON: {e}"}
+            continue
+        if not isinstance(order, dict):
+            yield {'order': f"line {number}", 'error': "Order must be a JSON object with 'items' and 'bins'"}
+            continue
+        order.setdefault('order', f"line {number}")
+        yield order
+
+
+def read_csv(stream: TextIO, order_column: Optional[str] = None) -> Iterator[dict]:
+    """Yield orders from a CSV stream, one per run of rows sharing an order id.
+
+    Rows of one order must be consecutive; the file is never loaded whole.
+    """
+    header = stream.readline()
+    if not header:
+        return
+    # Same separators as the app's CSV import
+    try:
+        dialect = csv.Sniffer().sniff(header, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(itertools.chain([header], stream), dialect=dialect)
+
+    if order_column is None:
+        for field in reader.fieldnames or []:
+            if field.strip().lower() in ORDER_COLUMNS:
+                order_column = field
+                break
+        else:
+            raise ValueError(f"No order id column found. Expected one of: {', '.join(ORDER_COLUMNS)}")
+    elif order_column not in (reader.fieldnames or []):
+        raise ValueError(f"Order column '{order_column}' not in {', '.join(reader.fieldnames or [])}")
+
+    for order_id, rows in itertools.groupby(reader, key=lambda row: row[order_column]):
+        items = []
+        for row in rows:
+            row.pop(order_column)
+            items.append(row)
+        yield {'order': order_id, 'items': items}
+
+
+def parse_bin(text: str) -> dict:
+    """Parse a --bin value: WxHxD, optionally :LIMIT for the instance cap."""
+    dims, _, limit = text.partition(':')
+    w, h, d = (float(v) for v in dims.lower().split('x'))
+    record = {'w': w, 'h': h, 'd': d}
+    if limit:
+        record['qty'] = int(limit)
+    return record
+
+
+def parse_option(text: str) -> Tuple[str, object]:
+    """Parse a --option value: key=value, the value read as JSON when possible (true, 3, "x")."""
+    key, _, value = text.partition('=')
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def pack_order(order: dict, default_bins: List[dict], pack_options: dict, deadline: Optional[float] = None) -> dict:
+    """Pack one order and return its JSON-ready result. Errors are reported, not raised.
+
+    With a deadline (a time.time() value) the search stops once it passes;
+    the result then has status 'timeout' and holds the bins packed so far.
+    """
+    started = time.perf_counter()
+    result = {'order': order.get('order')}
+    if 'error' in order:
+        result.update(status='error', error=order['error'])
+        return result
+    try:
+        packer = build_packer(order.get('items') or [], order.get('bins') or default_bins)
+        if deadline is not None:
+            packer.progress = lambda placed, total, bin: time.time() < deadline
+        packer.pack(**pack_options)
+    except (ValueError, TypeError, KeyError) as e:
+        # Invalid records, or pack options Packer.pack does not know
+        result.update(status='error', error=str(e))
+        return result
+
+    used = [b for b in packer.bins if b.items]
+    used_volume = sum(b.get_volume() for b in used)
+    packed_volume = sum(b.used_volume for b in used)
+    result.update(
+        status='timeout' if packer.cancelled else 'ok',
+        bins_used=len(used),
+        lower_bound=packer.lower_bound,
+        utilization=packed_volume / used_volume if used_volume > 0 else 0,
+        unfit=[i.name for i in packer.unfit_items],
+        bins=[
+            {
+                'name': b.name,
+                'width': b.width, 'height': b.height, 'depth': b.depth,
+                'items': [
+                    {'name': i.name, 'position': list(i.position), 'dimensions': list(i.get_dimension()),
+                     'rotation_type': i.rotation_type}
+                    for i in b.items
+                ],
+            }
+            for b in used
+        ],
+        elapsed=time.perf_counter() - started,
+    )
+    return result
+
+
+def count_units(item_records: List[dict]) -> int:
+    """Total quantity of an order's item records, validated the way build_packer reads them."""
+    valid, msg, items = validate_items_df(normalize_columns(pd.DataFrame(item_records)))
+    if not valid:
+        raise ValueError(msg)
+    return int(items['qty'].sum())
+
+
+def build_packer(item_records: List[dict], bin_records: List[dict]) -> Packer:
+    """Validate raw item and container records the way the app import does and load a Packer."""
+    if not bin_records:
+        raise ValueError("No containers given (order has no 'bins' and no --bin/--bins default).")
+    valid, msg, items = validate_items_df(normalize_columns(pd.DataFrame(item_records)))
+    if not valid:
+        raise ValueError(msg)
+    valid, msg, bins = validate_bins_df(normalize_columns(pd.DataFrame(bin_records)))
+    if not valid:
+        raise ValueError(msg)
+
+    packer = Packer()
+    for i, b in enumerate(bins.to_dict('records')):
+        limit = b.get('qty')
+        limit = int(limit) if limit is not None and pd.notna(limit) else None
+        max_weight = b.get('weight')
+        max_weight = float(max_weight) if max_weight is not None and pd.notna(max_weight) else 0
+        packer.add_bin_type(BinType(f"Type {i+1}", float(b['w']), float(b['h']), float(b['d']),
+                                    max_weight=max_weight, limit=limit))
+    for row in items.to_dict('records'):
+        weight = float(row['weight']) if 'weight' in row else 0
+        max_load = float(row['max_load']) if 'max_load' in row else 0
+        fragile = bool(row.get('fragile', False))
+        for _ in range(int(row['qty'])):
+            packer.add_item(Item(str(row['name']), float(row['w']), float(row['h']), float(row['d']), weight,
+                                 max_load, fragile))
+    return packer
+
+
+def run(orders: Iterator[dict], out: TextIO, default_bins: List[dict], pack_options: dict,
+        workers: int = 1, window: Optional[int] = None) -> Tuple[int, int]:
+    """Pack every order and write one JSON line each; returns (ok, failed) counts.
+
+    With workers > 1 orders are packed on a process pool and written in
+    completion order; at most `window` orders (default 4 per worker) are read
+    ahead of the slowest one.
+    """
+    counts = [0, 0]
+
+    def emit(result: dict):
+        counts[result['status'] != 'ok'] += 1
+        out.write(json.dumps(result) + '\n')
+        out.flush()
+
+    if workers <= 1:
+        for order in orders:
+            emit(pack_order(order, default_bins, pack_options))
+        return counts[0], counts[1]
+
+    window = window or workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for order in orders:
+            pending.add(pool.submit(pack_order, order, default_bins, pack_options))
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    emit(future.result())
+        for future in wait(pending).done:
+            emit(future.result())
+    return counts[0], counts[1]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Pack a batch of orders and stream one JSON plan per order.")
+    parser.add_argument('input', help="Orders file (.jsonl or .csv), or - for stdin")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help="Input format (default: from the file extension)")
+    parser.add_argument('--order-column', help=f"CSV order id column (default: first of {', '.join(ORDER_COLUMNS)})")
+    parser.add_argument('--bin', action='append', default=[], type=parse_bin, metavar='WxHxD[:LIMIT]',
+                        help="Default container type, repeatable")
+    parser.add_argument('--bins', metavar='FILE', help="Default container types from a CSV/Excel/XML/JSON file")
+    parser.add_argument('--out', default='-', help="Output JSONL file (default: stdout)")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes")
+    parser.add_argument('--option', action='append', default=[], metavar='KEY=VALUE',
+                        help="Extra Packer.pack keyword argument, e.g. --option block_building=true")
+    args = parser.parse_args(argv)
+
+    default_bins = list(args.bin)
+    if args.bins:
+        with open(args.bins, 'rb') as f:
+            valid, msg, bins = import_file(f, 'bins')
+        if not valid:
+            parser.error(f"{args.bins}: {msg}")
+        default_bins += bins.to_dict('records')
+
+    fmt = args.format
+    if fmt is None:
+        fmt = 'csv' if args.input.lower().endswith('.csv') else 'jsonl'
+    stream = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8', newline='')
+    out = sys.stdout if args.out == '-' else open(args.out, 'w', encoding='utf-8')
+    try:
+        orders = read_csv(stream, args.order_column) if fmt == 'csv' else read_jsonl(stream)
+        pack_options = dict(parse_option(o) for o in args.option)
+        ok, failed = run(orders, out, default_bins, pack_options, workers=args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if out is not sys.stdout:
+            out.close()
+    print(f"{ok} orders packed, {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
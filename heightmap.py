@@ -0,0 +1,280 @@
+import math
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Grid cells along the longer floor side when no cell size is given
+MAX_CELLS = 256
+# Candidates per query handed to the load check before the bin is given up
+LOAD_CHECKS = 32
+EPS = 1e-9
+
+
+def _window_max(a: np.ndarray, size: int) -> np.ndarray:
+    # Running maximum over windows of `size` along the first axis, by doubling
+    # spans: log2(size) whole-array passes instead of one pass per offset
+    span = 1
+    while span * 2 <= size:
+        a = np.maximum(a[:-span], a[span:])
+        span *= 2
+    if span < size:
+        a = np.maximum(a[:a.shape[0] - (size - span)], a[size - span:])
+    return a
+
+
+class HeightMap:
+    """Top surface of a bin's load as a 2D grid over the floor (width x depth).
+
+    heights[i, k] is the highest item top over cell (i, k), so an item put
+    on the grid rests at the maximum height under its footprint. Footprints
+    are rounded up to whole cells, which keeps placements free of overlaps;
+    the space under an overhang is given up.
+
+    Placement looks for the lowest position where the item is supported on
+    at least min_support of its footprint area, over every orientation:
+    resting heights come from separable sliding-window maxima and supported
+    areas from a summed-area table, so each query is a few NumPy passes over
+    the grid. Support only counts cells wholly covered by both the item and
+    the tops below it, so it is never overstated on a coarse grid.
+
+    With load limits in the bin (see ContactGraph), positions on fragile or
+    nearly full tops are masked out the same way, and the remaining
+    candidates go through the exact load check in order.
+
+    The grid only changes when an item is placed, so resting heights and
+    support tables are kept between queries until then, as are the item
+    shapes already found not to fit: a bin that failed an item answers its
+    copies at once.
+    """
+    def __init__(self, bin, cell: Optional[float] = None, max_cells: int = MAX_CELLS):
+        self.bin = bin
+        if cell is None:
+            cell = max(bin.width, bin.depth) / max_cells
+            # Integer floors get exact unit cells while they fit the budget
+            if cell <= 1 and float(bin.width).is_integer() and float(bin.depth).is_integer():
+                cell = 1.0
+        self.cell = cell
+        self.heights = np.zeros((int(bin.width / cell + EPS), int(bin.depth / cell + EPS)))
+        # Same, but only counting tops that cover a cell completely (rounded
+        # inwards), so support is never overstated on a coarse grid
+        self.solid = np.zeros_like(self.heights)
+        # Index into owners of the item forming each cell's top (-1: floor)
+        self.owner = np.full(self.heights.shape, -1, dtype=np.int32)
+        self.owners: List = []
+        # Cells where each owner is still the top
+        self.visible: List[int] = []
+        self._checks_left = 0
+        # Memos valid until the next _raise: resting heights by footprint,
+        # summed-area tables by level, and shapes (orientations, min_support)
+        # with no position (queries without a load check only)
+        self._bases: Dict[Tuple[int, int], np.ndarray] = {}
+        self._tables: Dict[tuple, np.ndarray] = {}
+        self._failed: set = set()
+        # Lowest cell, and the lowest resting level of each footprint computed
+        # so far: a footprint at least as large in both directions rests no lower
+        self._floor = 0.0
+        self._levels: List[Tuple[int, int, float]] = []
+        for item in bin.items:
+            self._raise(item)
+
+    def _cells(self, length: float) -> int:
+        return math.ceil(length / self.cell - EPS)
+
+    def _raise(self, item):
+        # Lift the cells under a placed item to its top
+        self._bases.clear()
+        self._tables.clear()
+        self._failed.clear()
+        self._levels.clear()
+        pos, dim = item.position, item.get_dimension()
+        top = pos[1] + dim[1]
+        x0, z0 = pos[0] / self.cell, pos[2] / self.cell
+        x1, z1 = (pos[0] + dim[0]) / self.cell, (pos[2] + dim[2]) / self.cell
+        cells = (slice(int(x0 + EPS), math.ceil(x1 - EPS)), slice(int(z0 + EPS), math.ceil(z1 - EPS)))
+        window = self.heights[cells]
+        surface = window <= top + EPS
+        np.maximum(window, top, out=window)
+        owner = self.owner[cells]
+        for o, count in zip(*np.unique(owner[surface & (owner >= 0)], return_counts=True)):
+            self.visible[o] -= int(count)
+        owner[surface] = len(self.owners)
+        self.owners.append(item)
+        self.visible.append(int(surface.sum()))
+        window = self.solid[math.ceil(x0 - EPS):int(x1 + EPS), math.ceil(z0 - EPS):int(z1 + EPS)]
+        np.maximum(window, top, out=window)
+        self._floor = float(self.heights.min())
+
+    def _capacity(self) -> np.ndarray:
+        # Extra load each owner can take before it or anything below it is
+        # overloaded (negative for fragile items)
+        contacts = self.bin.contacts
+        contacts.track()
+        room: Dict[int, float] = {}
+
+        def spare(item) -> float:
+            key = id(item)
+            if key not in room:
+                value = -1.0 if item.fragile else item.max_load - contacts.load_on(item) if item.max_load > 0 else np.inf
+                supports = contacts.supports[key]
+                total = sum(area for _, area in supports)
+                for below, area in supports:
+                    value = min(value, spare(below) * total / area)
+                room[key] = value
+            return room[key]
+
+        return np.array([spare(o) for o in self.owners])
+
+    def find(self, item, min_support: float,
+             accept: Optional[Callable[[list, int], bool]] = None) -> Optional[Tuple[int, list]]:
+        """Lowest supported (rotation_type, position) for item, or None.
+
+        Ties are broken by the resting height of the orientation's top, then
+        back-left (smallest z, then x). accept(position, rotation), if given,
+        can veto candidates (load limits of the items below); after
+        LOAD_CHECKS vetoes the best position found so far stands.
+        """
+        heights = self.heights
+        nx, nz = heights.shape
+        stats = self.bin.stats
+        # Lowest cell too high for every orientation, or the same shape failed already
+        if all(self._floor + h > self.bin.height + EPS for _, (_, h, _) in item.orientations):
+            return None
+        shape = (tuple(dims for _, dims in item.orientations), min_support)
+        if accept is None and shape in self._failed:
+            return None
+        best = None
+        # Orientations often share a footprint, and summed-area tables a level
+        bases, tables = self._bases, self._tables
+        # Visible items that could not take the whole item, by the height of their top
+        limited: Dict[float, List[int]] = {}
+        if accept is not None:
+            capacity = self._capacity()
+            for o in np.flatnonzero((capacity < item.weight) & (np.array(self.visible) > 0)):
+                owner = self.owners[o]
+                limited.setdefault(owner.position[1] + owner.get_dimension()[1], []).append(o)
+        self._checks_left = LOAD_CHECKS
+        for rotation, (w, h, d) in item.orientations:
+            fw, fd = self._cells(w), self._cells(d)
+            if fw > nx or fd > nz or self._too_high(fw, fd, self.bin.height - h + EPS):
+                continue
+            if accept is not None and self._checks_left <= 0:
+                break
+            if stats is not None:
+                stats.rotations_tried += 1
+            # Resting height of every footprint position, max over rows then columns
+            base = bases.get((fw, fd))
+            if base is None:
+                base = bases[fw, fd] = _window_max(_window_max(heights, fw).T, fd).T
+                self._remember_level(fw, fd, float(base.min()))
+            feasible = base + h <= self.bin.height + EPS
+            if best is not None:
+                feasible &= (base < best[0] - EPS) | ((np.abs(base - best[0]) <= EPS) & (base + h < best[1] - EPS))
+            # Support is counted on the cells lying wholly under the item
+            sw, sd = int(w / self.cell + EPS), int(d / self.cell + EPS)
+            needed = min_support * w * d / self.cell ** 2 - EPS
+            for level in np.unique(base[feasible]):
+                ok = feasible & (base == level)
+                if level > EPS:
+                    # Cells fully covered at the resting height carry the
+                    # item; nothing in the window is higher than level
+                    table = tables.get(('solid', level))
+                    if table is None:
+                        table = tables['solid', level] = self._summed_area(self.solid >= level - EPS)
+                    ok &= self._window_sums(table, sw, sd, ok.shape) >= needed
+                    if float(level) in limited:
+                        ok = self._overloaded(item.weight, fw, fd, ok, level, limited[float(level)], capacity)
+                cell = self._first(ok, level, rotation, accept)
+                if cell is not None:
+                    best = (float(level), float(level) + h, rotation) + cell
+                    break
+        if best is None:
+            if accept is None:
+                self._failed.add(shape)
+            return None
+        level, _, rotation, i, k = best
+        return rotation, [i * self.cell, level, k * self.cell]
+
+    def _too_high(self, fw: int, fd: int, limit: float) -> bool:
+        # True if an fw x fd footprint surely rests above limit, without a grid pass
+        if self._floor > limit:
+            return True
+        for w, d, level in self._levels:
+            if level > limit and w <= fw and d <= fd:
+                return True
+        return False
+
+    def _remember_level(self, fw: int, fd: int, level: float):
+        # Keep only entries that no other entry implies
+        levels = self._levels
+        if any(w <= fw and d <= fd and low >= level for w, d, low in levels):
+            return
+        levels[:] = [e for e in levels if not (e[0] >= fw and e[1] >= fd and e[2] <= level)]
+        levels.append((fw, fd, level))
+
+    def _overloaded(self, weight: float, fw: int, fd: int, ok: np.ndarray, level: float,
+                    owners: List[int], capacity: np.ndarray) -> np.ndarray:
+        # Positions of ok (all resting at level) where the share of weight
+        # landing on one of owners, whose tops are at level, exceeds what it
+        # can still take. Shares go by contact cells; only windows around
+        # each owner are looked at
+        bad = np.zeros(ok.shape, dtype=bool)
+        rows, cols = ok.shape
+        for o in owners:
+            owner = self.owners[o]
+            pos, dim = owner.position, owner.get_dimension()
+            i0 = max(int(pos[0] / self.cell + EPS) - fw + 1, 0)
+            i1 = min(self._cells(pos[0] + dim[0]), rows)
+            k0 = max(int(pos[2] / self.cell + EPS) - fd + 1, 0)
+            k1 = min(self._cells(pos[2] + dim[2]), cols)
+            if i0 >= i1 or k0 >= k1 or not ok[i0:i1, k0:k1].any():
+                continue
+            region = (slice(i0, i1 + fw - 1), slice(k0, k1 + fd - 1))
+            shape = (i1 - i0, k1 - k0)
+            cells = self._window_sums(self._summed_area(self.owner[region] == o), fw, fd, shape)
+            if capacity[o] < 0:
+                bad[i0:i1, k0:k1] |= cells > 0
+                continue
+            contact = self._window_sums(self._summed_area(np.abs(self.heights[region] - level) <= EPS), fw, fd, shape)
+            bad[i0:i1, k0:k1] |= cells * weight > capacity[o] * contact + EPS
+        return ok & ~bad
+
+    def _first(self, ok: np.ndarray, level: float, rotation: int, accept) -> Optional[Tuple[int, int]]:
+        # First cell of ok in back-left order whose placement accept allows
+        for k, i in np.argwhere(ok.T):
+            position = [float(i * self.cell), float(level), float(k * self.cell)]
+            if accept is None:
+                return int(i), int(k)
+            if self._checks_left <= 0:
+                return None
+            if accept(position, rotation):
+                return int(i), int(k)
+            self._checks_left -= 1
+        return None
+
+    @staticmethod
+    def _summed_area(mask: np.ndarray) -> np.ndarray:
+        # table[i, k] counts the set cells in mask[:i, :k]
+        table = np.zeros((mask.shape[0] + 1, mask.shape[1] + 1), dtype=np.int32)
+        np.cumsum(np.cumsum(mask, axis=0, dtype=np.int32), axis=1, out=table[1:, 1:])
+        return table
+
+    @staticmethod
+    def _window_sums(table: np.ndarray, fw: int, fd: int, shape: Tuple[int, int]) -> np.ndarray:
+        # Set cells in the fw x fd window at each of the first shape positions
+        rows, cols = shape
+        return (table[fw:fw + rows, fd:fd + cols] - table[:rows, fd:fd + cols]
+                - table[fw:fw + rows, :cols] + table[:rows, :cols])
+
+    def place(self, item, min_support: float) -> bool:
+        """Put item at its lowest supported position; False if there is none."""
+        bin = self.bin
+        accept = None
+        if bin.contacts.checks(item):
+            accept = lambda position, rotation: bin.load_ok(item, position, rotation)
+        found = self.find(item, min_support, accept)
+        if found is None:
+            return False
+        item.rotation_type, item.position = found
+        bin._add(item)
+        self._raise(item)
+        return True
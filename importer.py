@@ -0,0 +1,503 @@
+"""File parsing and validation shared by the Streamlit app and the batch CLI.
+
+Kept free of Streamlit so it can be imported headless.
+"""
+import csv
+import io
+import itertools
+import json
+import re
+import xml.etree.ElementTree as ET
+from io import StringIO
+from typing import Dict, Iterator, List, Tuple
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+def parse_csv(file) -> pd.DataFrame:
+    """Parse CSV file with auto-detection of separator."""
+    content = file.read().decode('utf-8')
+    # Try comma first, then semicolon
+    for sep in [',', ';', '\t']:
+        try:
+            df = pd.read_csv(StringIO(content), sep=sep)
+            if len(df.columns) >= 3:
+                return df
+        except Exception:
+            continue
+    return pd.read_csv(StringIO(content))
+
+
+def parse_excel(file) -> pd.DataFrame:
+    """Parse Excel (.xlsx / .xls) file."""
+    return pd.read_excel(file, engine='openpyxl')
+
+
+def parse_xml(file) -> pd.DataFrame:
+    """Parse XML file. Expects <items><item> or <bins><bin> structure."""
+    content = file.read().decode('utf-8')
+    root = ET.fromstring(content)
+    
+    records = []
+    # Try to find child elements (item, bin, row, record, etc.)
+    for child in root:
+        record = {}
+        for field in child:
+            tag = field.tag.strip().lower()
+            text = field.text.strip() if field.text else ''
+            # Try numeric conversion
+            try:
+                record[tag] = float(text)
+                if record[tag] == int(record[tag]):
+                    record[tag] = int(record[tag])
+            except (ValueError, TypeError):
+                record[tag] = text
+        if record:
+            records.append(record)
+    
+    return pd.DataFrame(records)
+
+
+def parse_json(file) -> pd.DataFrame:
+    """Parse JSON file. Expects a list of objects."""
+    content = file.read().decode('utf-8')
+    data = json.loads(content)
+    if isinstance(data, list):
+        return pd.DataFrame(data)
+    elif isinstance(data, dict):
+        # Check for common wrapper keys
+        for key in ['items', 'bins', 'data', 'records']:
+            if key in data and isinstance(data[key], list):
+                return pd.DataFrame(data[key])
+        return pd.DataFrame([data])
+    return pd.DataFrame()
+
+
+def parse_uploaded_file(file) -> pd.DataFrame:
+    """Route to correct parser based on file extension."""
+    name = file.name.lower()
+    if name.endswith('.csv'):
+        return parse_csv(file)
+    elif name.endswith(('.xlsx', '.xls')):
+        return parse_excel(file)
+    elif name.endswith('.xml'):
+        return parse_xml(file)
+    elif name.endswith('.json'):
+        return parse_json(file)
+    else:
+        raise ValueError(f"Unsupported file format: {name}")
+
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalize column names to expected format.
+    
+    Uses keyword-contains matching so columns like 'Width_cm', 
+    'Height_mm', 'Depth_in', 'item_name' are all correctly detected.
+    Priority order ensures exact matches win over partial matches.
+    """
+    return df.rename(columns=column_map(df.columns))
+
+
+def column_map(columns) -> Dict[str, str]:
+    """Map raw column names to the expected ones (see normalize_columns)."""
+    # Define mapping rules: (target_name, exact_matches, contains_keywords)
+    rules = [
+        ('name', 
+         {'name', 'item_name', 'item', 'isim', 'ad', 'ürün', 'urun', 'adi', 'adı', 'product', 'label'},
+         ['name', 'item', 'isim', 'ürün', 'urun', 'product', 'label', 'adi', 'adı']),
+        ('w',    
+         {'w', 'width', 'genişlik', 'genislik', 'en'},
+         ['width', 'genişlik', 'genislik']),
+        ('h',    
+         {'h', 'height', 'yükseklik', 'yukseklik', 'boy'},
+         ['height', 'yükseklik', 'yukseklik']),
+        ('d',    
+         {'d', 'depth', 'derinlik', 'uzunluk', 'length'},
+         ['depth', 'derinlik', 'uzunluk', 'length']),
+        ('qty',  
+         {'qty', 'quantity', 'count', 'adet', 'miktar', 'sayi', 'sayı'},
+         ['qty', 'quantity', 'count', 'adet', 'miktar', 'sayi', 'sayı']),
+        ('weight',
+         {'weight', 'agirlik', 'ağırlık'},
+         ['weight', 'agirlik', 'ağırlık']),
+        ('max_load',
+         {'max_load', 'maxload', 'max load', 'load_limit', 'stack_limit', 'max_yuk', 'max_yük'},
+         ['max load', 'load limit', 'stack limit', 'max yuk', 'max yük']),
+        ('fragile',
+         {'fragile', 'kirilgan', 'kırılgan'},
+         ['fragile', 'kirilgan', 'kırılgan']),
+    ]
+    
+    col_map = {}
+    mapped_targets = set()  # Prevent duplicate mappings
+    
+    # Pass 1: Exact matches (highest priority)
+    for col in columns:
+        lower = col.strip().lower()
+        for target, exact_set, _ in rules:
+            if target not in mapped_targets and lower in exact_set:
+                col_map[col] = target
+                mapped_targets.add(target)
+                break
+    
+    # Pass 2: Contains-keyword matches (for remaining unmapped columns)
+    for col in columns:
+        if col in col_map:
+            continue
+        lower = col.strip().lower()
+        # Remove common suffixes/units for cleaner matching
+        cleaned = lower.replace('_', ' ').replace('-', ' ')
+        for target, _, keywords in rules:
+            if target not in mapped_targets:
+                for kw in keywords:
+                    if kw in cleaned:
+                        col_map[col] = target
+                        mapped_targets.add(target)
+                        break
+                if col in col_map:
+                    break
+    
+    return col_map
+
+
+def parse_flag(value) -> bool:
+    """Read a yes/no cell: 1, true, yes, x, evet (any case) are yes; blanks are no."""
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'y', 'x', 'evet', 'e')
+    return bool(value) and not pd.isna(value)
+
+
+def validate_items_df(df: pd.DataFrame) -> tuple:
+    """Validate DataFrame for item import. Returns (is_valid, message, cleaned_df)."""
+    required = ['w', 'h', 'd']
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        return False, f"Missing required columns: {', '.join(missing)}. Found: {', '.join(df.columns)}", df
+    
+    # Add defaults
+    if 'name' not in df.columns:
+        df['name'] = [f"Item {i+1}" for i in range(len(df))]
+    if 'qty' not in df.columns:
+        df['qty'] = 1
+    
+    # Convert to numeric
+    for col in ['w', 'h', 'd', 'qty']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    
+    # Drop rows with NaN in critical columns
+    before = len(df)
+    df = df.dropna(subset=['w', 'h', 'd'])
+    dropped = before - len(df)
+    
+    df['qty'] = df['qty'].fillna(1).astype(int)
+    if 'weight' in df.columns:
+        df['weight'] = pd.to_numeric(df['weight'], errors='coerce').fillna(0)
+    if 'max_load' in df.columns:
+        df['max_load'] = pd.to_numeric(df['max_load'], errors='coerce').fillna(0)
+    if 'fragile' in df.columns:
+        df['fragile'] = df['fragile'].map(parse_flag)
+    
+    msg = f"✅ {len(df)} items ready to import."
+    if dropped > 0:
+        msg += f" ({dropped} rows skipped due to invalid data)"
+    
+    return True, msg, df
+
+
+def validate_bins_df(df: pd.DataFrame) -> tuple:
+    """Validate DataFrame for bin import. Returns (is_valid, message, cleaned_df)."""
+    required = ['w', 'h', 'd']
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        return False, f"Missing required columns: {', '.join(missing)}. Found: {', '.join(df.columns)}", df
+    
+    for col in ['w', 'h', 'd']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    # Optional instance limit per container type (blank = unlimited)
+    if 'qty' in df.columns:
+        df['qty'] = pd.to_numeric(df['qty'], errors='coerce')
+    
+    before = len(df)
+    df = df.dropna(subset=['w', 'h', 'd'])
+    dropped = before - len(df)
+    
+    msg = f"✅ {len(df)} container types ready to import."
+    if dropped > 0:
+        msg += f" ({dropped} rows skipped due to invalid data)"
+    
+    return True, msg, df
+
+
+# ─────────────────────────────────────────────────────
+# STREAMING IMPORT
+# ─────────────────────────────────────────────────────
+# The parse_* functions above hold the whole file (and several copies of it)
+# in memory. The functions below read large files in row chunks: the layout
+# is detected from a small sample, each chunk is normalized and validated on
+# its own, and only compact typed columns are kept.
+
+SAMPLE_BYTES = 64 * 1024
+CHUNK_ROWS = 50_000
+READ_BLOCK = 1 << 16
+
+# Wrapper keys of a JSON object holding the record list, as in parse_json
+JSON_LIST_KEYS = ('items', 'bins', 'data', 'records')
+
+# Columns kept by import_file, per import kind
+IMPORT_COLUMNS = {
+    'items': ['name', 'w', 'h', 'd', 'qty', 'weight', 'max_load', 'fragile'],
+    'bins': ['w', 'h', 'd', 'qty', 'weight'],
+}
+
+
+def sniff_separator(sample: str) -> str:
+    """Detect the CSV separator from the first lines of a file."""
+    lines = sample.splitlines()[:20]
+    try:
+        return csv.Sniffer().sniff('\n'.join(lines), delimiters=',;\t').delimiter
+    except csv.Error:
+        # Same preference as parse_csv: the first separator giving 3+ columns
+        header = lines[0] if lines else ''
+        for sep in [',', ';', '\t']:
+            if header.count(sep) >= 2:
+                return sep
+        return ','
+
+
+def _rewind(file):
+    if hasattr(file, 'seek'):
+        file.seek(0)
+
+
+def iter_csv_chunks(file, chunksize: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Read a CSV upload in chunks, with separator and columns taken from a sample.
+
+    Only columns that map to an expected name are parsed (all of them if
+    none do, so validation can report what was found).
+    """
+    _rewind(file)
+    sample = file.read(SAMPLE_BYTES).decode('utf-8-sig', errors='ignore')
+    _rewind(file)
+    if not sample.strip():
+        return
+    sep = sniff_separator(sample)
+    header = next(csv.reader([sample.splitlines()[0]], delimiter=sep))
+    mapping = column_map(header)
+    names = [raw for raw, target in mapping.items() if target == 'name']
+
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    try:
+        reader = pd.read_csv(text, sep=sep, chunksize=chunksize, usecols=list(mapping) or None,
+                             dtype={raw: str for raw in names})
+        for chunk in reader:
+            yield chunk
+    finally:
+        # Leave the caller's file open
+        text.detach()
+
+
+def iter_xml_chunks(file, chunksize: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Read an XML upload (<items><item>...</item></items>) in chunks with iterparse."""
+    _rewind(file)
+    rows: List[dict] = []
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(file, events=('start', 'end')):
+        if event == 'start':
+            depth += 1
+            if root is None:
+                root = elem
+            continue
+        depth -= 1
+        if depth == 1:
+            # End of one record element
+            record = {field.tag.strip().lower(): field.text.strip() if field.text else '' for field in elem}
+            if record:
+                rows.append(record)
+            # Drop processed records from the tree
+            root.clear()
+            if len(rows) >= chunksize:
+                yield pd.DataFrame(rows)
+                rows = []
+    if rows:
+        yield pd.DataFrame(rows)
+
+
+def _iter_json_records(text) -> Iterator[dict]:
+    # Decode the elements of the record list one at a time from a sliding buffer
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+
+    def fill() -> bool:
+        nonlocal buffer, pos
+        more = text.read(READ_BLOCK)
+        buffer = buffer[pos:] + more
+        pos = 0
+        return bool(more)
+
+    def skip(pattern) -> str:
+        # Move past pattern; the next character ('' at the end of input)
+        nonlocal pos
+        while True:
+            pos = pattern.match(buffer, pos).end()
+            if pos < len(buffer) or not fill():
+                return buffer[pos:pos + 1]
+
+    def value():
+        # One whole JSON value at pos, reading more input while it is cut off
+        nonlocal pos
+        while True:
+            try:
+                result, pos = decoder.raw_decode(buffer, pos)
+                return result
+            except json.JSONDecodeError:
+                if not fill():
+                    raise
+
+    blanks = re.compile(r'\s*')
+    separators = re.compile(r'[\s,]*')
+    first = skip(blanks)
+    if first == '{':
+        # A wrapper object: stream the first top-level list under a known key,
+        # keeping the other members (a single record if there is none)
+        members = {}
+        pos += 1
+        while True:
+            if skip(separators) == '}':
+                yield members
+                return
+            key = value()
+            if skip(blanks) != ':':
+                raise ValueError("Expected ':' after an object key")
+            pos += 1
+            if skip(blanks) == '[' and key in JSON_LIST_KEYS:
+                pos += 1
+                break
+            members[key] = value()
+    elif first == '[':
+        pos += 1
+    else:
+        # A bare value (or nothing) holds no records; still has to be valid JSON
+        if first:
+            json.loads(buffer[pos:] + text.read())
+        return
+
+    while True:
+        char = skip(separators)
+        if not char:
+            raise ValueError("Unexpected end of JSON input")
+        if char == ']':
+            return
+        yield value()
+
+
+def iter_json_chunks(file, chunksize: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Read a JSON upload (a list of objects, possibly under a wrapper key) in chunks."""
+    _rewind(file)
+    text = io.TextIOWrapper(file, encoding='utf-8-sig')
+    try:
+        rows: List[dict] = []
+        for record in _iter_json_records(text):
+            rows.append(record)
+            if len(rows) >= chunksize:
+                yield pd.DataFrame(rows)
+                rows = []
+        if rows:
+            yield pd.DataFrame(rows)
+    finally:
+        text.detach()
+
+
+def iter_excel_chunks(file, chunksize: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Read the first sheet of an .xlsx upload in chunks (openpyxl read-only mode)."""
+    import openpyxl
+
+    _rewind(file)
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+        while True:
+            batch = list(itertools.islice(rows, chunksize))
+            if not batch:
+                break
+            yield pd.DataFrame(batch, columns=columns)
+    finally:
+        workbook.close()
+
+
+def iter_file_chunks(file, chunksize: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Route to the streaming reader for the file extension."""
+    name = file.name.lower()
+    if name.endswith('.csv'):
+        return iter_csv_chunks(file, chunksize)
+    elif name.endswith('.xlsx'):
+        return iter_excel_chunks(file, chunksize)
+    elif name.endswith('.xls'):
+        # Legacy format, no streaming reader
+        return iter([parse_excel(file)])
+    elif name.endswith('.xml'):
+        return iter_xml_chunks(file, chunksize)
+    elif name.endswith('.json'):
+        return iter_json_chunks(file, chunksize)
+    else:
+        raise ValueError(f"Unsupported file format: {name}")
+
+
+def _compact(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    # Keep the expected columns only; names as categories, whole numbers as
+    # the smallest integer type
+    df = df[[c for c in columns if c in df.columns]]
+    out = {}
+    for col in df.columns:
+        values = df[col]
+        if col == 'name':
+            out[col] = values.astype(str).astype('category')
+            continue
+        values = pd.to_numeric(values, errors='coerce')
+        if values.notna().all() and (values % 1 == 0).all():
+            out[col] = pd.to_numeric(values, downcast='integer')
+        else:
+            out[col] = values.astype('float64')
+    return pd.DataFrame(out)
+
+
+def import_file(file, kind: str = 'items', chunksize: int = CHUNK_ROWS) -> Tuple[bool, str, pd.DataFrame]:
+    """Streaming counterpart of parse_uploaded_file + normalize_columns + validate_*_df.
+
+    kind is 'items' or 'bins'. Returns (is_valid, message, df) like the
+    validators, with df holding only the expected columns in compact dtypes.
+    """
+    validate = validate_items_df if kind == 'items' else validate_bins_df
+    parts = []
+    rows = dropped = 0
+    for chunk in iter_file_chunks(file, chunksize):
+        chunk = normalize_columns(chunk)
+        unnamed = kind == 'items' and 'name' not in chunk.columns
+        valid, msg, cleaned = validate(chunk)
+        if not valid:
+            return False, msg, chunk
+        if unnamed:
+            # Number default names across the whole file, not per chunk
+            positions = chunk.index.get_indexer(cleaned.index)
+            cleaned['name'] = [f"Item {rows + i + 1}" for i in positions]
+        rows += len(chunk)
+        dropped += len(chunk) - len(cleaned)
+        parts.append(_compact(cleaned, IMPORT_COLUMNS[kind]))
+
+    if not parts:
+        return validate(pd.DataFrame())
+    df = pd.concat(parts, ignore_index=True)
+    if 'name' in df.columns:
+        df['name'] = union_categoricals([p['name'] for p in parts])
+
+    label = 'items' if kind == 'items' else 'container types'
+    msg = f"✅ {len(df)} {label} ready to import."
+    if dropped > 0:
+        msg += f" ({dropped} rows skipped due to invalid data)"
+    return True, msg, df
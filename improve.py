@@ -0,0 +1,215 @@
+import math
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from packer import Bin, Item, Packer
+
+# Placement of one sequence position: (bin, rotation_type, position), bin None
+# for an unfit item
+Record = Tuple[Optional[Bin], int, Optional[List[float]]]
+
+# Re-packed suffix of a candidate: exponential length with mean n/10 but at
+# most SUFFIX_MEAN, cut off at SUFFIX_MAX, so a candidate costs about the
+# same on any instance size
+SUFFIX_MEAN = 10
+SUFFIX_MAX = 50
+
+
+class Improver:
+    """Anytime simulated annealing over the item order and orientations of a packed Packer.
+
+    A candidate swaps or moves items in the packing sequence, or changes which
+    orientation an item tries first. The packer's own bins are the live state:
+    a candidate is scored by popping the placements from the first changed
+    position on (Bin.pop_item) and re-packing only that suffix. A rejected
+    candidate is rolled back the same way and the old suffix placements are put
+    back without searching.
+
+    `best` (an export_plan dict over the packer's items) and `best_score` always
+    hold the best solution found so far, so they can be read from another thread
+    while run() is going. run() stops early once the best solution meets the
+    packer's lower bound or the packer's progress callback returns False (a
+    cancelled job, a passed deadline), and applies the best plan to the
+    packer at the end.
+    """
+    def __init__(self, packer: Packer, seed: int = 0, distribute_items=False, vectorized=False,
+                 start_temperature: float = 0.5, end_temperature: float = 0.01):
+        self.packer = packer
+        self.random = random.Random(seed)
+        self.pack_options = {'distribute_items': distribute_items, 'vectorized': vectorized}
+        self.start_temperature = start_temperature
+        self.end_temperature = end_temperature
+        self.items = list(packer.items)
+        # Orientation order each item came with, and the accepted preferences
+        # that replace it while run() searches (by item id)
+        self._orientations = {id(item): item.orientations for item in self.items}
+        self.preferred: Dict[int, tuple] = {}
+        self.evaluated = 0
+        self._stop = False
+
+        self.sequence: List[Item] = list(packer._sequence)
+        self.records = self._records(self.sequence, {})
+        self.score = self._score(packer)
+        self.best_score = self.score
+        self.best = packer.export_plan(self.items)
+        # True while the packer's bins hold the best plan, so run() need not apply it
+        self._at_best = True
+        if packer.lower_bound == 0:
+            packer.compute_lower_bound()
+        self.optimal = packer.is_optimal()
+
+    def stop(self):
+        """Ask a running run() to return after the current candidate."""
+        self._stop = True
+
+    def run(self, budget: float) -> dict:
+        """Improve for `budget` seconds of wall clock, then apply and return the best plan.
+
+        A candidate still being packed when the budget runs out is dropped;
+        applying the best plan, when the search has moved away from it, comes
+        on top of the budget.
+        """
+        self._stop = False
+        progress = self.packer.progress
+        total = len(self.items)
+        for item in self.items:
+            if id(item) in self.preferred:
+                item.orientations = self.preferred[id(item)]
+        start = time.monotonic()
+        deadline = start + budget
+        while not self._stop and not self.optimal and len(self.sequence) > 1:
+            elapsed = time.monotonic() - start
+            if elapsed >= budget:
+                break
+            if progress is not None and progress(total, total, None) is False:
+                break
+            # Geometric cooling over the time budget
+            temperature = self.start_temperature * (self.end_temperature / self.start_temperature) ** (elapsed / budget)
+            self._step(temperature, deadline)
+        # Preferences belong to the search, not to the items
+        for item in self.items:
+            item.orientations = self._orientations[id(item)]
+        if not self._at_best:
+            self.packer.apply_plan(self.best, self.items)
+            self._at_best = True
+        return self.best
+
+    def _step(self, temperature: float, deadline: float):
+        sequence = list(self.sequence)
+        n = len(sequence)
+        # Moves stay inside a short suffix (see SUFFIX_MEAN), so each
+        # candidate re-packs only a few items
+        tail = min(n, SUFFIX_MAX, 2 + int(self.random.expovariate(1 / max(min(n / 10, SUFFIX_MEAN), 2))))
+        start = n - tail
+        move = self.random.random()
+        changed_orientation = None
+        if move < 0.4:
+            i, j = sorted(self.random.sample(range(start, n), 2))
+            sequence[i], sequence[j] = sequence[j], sequence[i]
+            k = i
+        elif move < 0.7:
+            i, j = self.random.sample(range(start, n), 2)
+            sequence.insert(j, sequence.pop(i))
+            k = min(i, j)
+        else:
+            # Try another orientation of one item first
+            k = self.random.randrange(start, n)
+            item = sequence[k]
+            if len(item.orientations) < 2:
+                return
+            changed_orientation = (item, item.orientations)
+            first = self.random.randrange(1, len(item.orientations))
+            rest = item.orientations[:first] + item.orientations[first + 1:]
+            item.orientations = (item.orientations[first],) + rest
+
+        self._rewind(self.records, k)
+        before = {id(bin): len(bin.items) for bin in self.packer.bins}
+        done = self.packer._pack_sequence(sequence[k:], progress=lambda placed, total, bin: time.monotonic() < deadline,
+                                          **self.pack_options)
+        self.packer.cancelled = False
+        if done < n - k:
+            # Out of time: undo the part packed so far and put the current solution back
+            if changed_orientation is not None:
+                changed_orientation[0].orientations = changed_orientation[1]
+            self._rewind(self.records[:k] + self._records(sequence[k:k + done], before), k)
+            self._replay(self.sequence[k:], self.records[k:])
+            self.packer._sequence = self.sequence
+            return
+        records = self.records[:k] + self._records(sequence[k:], before)
+        score = self._score(self.packer)
+        self.evaluated += 1
+
+        delta = self._energy(score) - self._energy(self.score)
+        if delta <= 0 or self.random.random() < math.exp(-delta / temperature):
+            self.sequence = sequence
+            self.records = records
+            self.score = score
+            self._at_best = False
+            if changed_orientation is not None:
+                item = changed_orientation[0]
+                self.preferred[id(item)] = item.orientations
+            if score < self.best_score:
+                self.best_score = score
+                self.best = self.packer.export_plan(self.items)
+                self._at_best = True
+                self.optimal = self.packer.is_optimal()
+        else:
+            if changed_orientation is not None:
+                changed_orientation[0].orientations = changed_orientation[1]
+            self._rewind(records, k)
+            self._replay(self.sequence[k:], self.records[k:])
+        self.packer._sequence = self.sequence
+
+    def _rewind(self, records: List[Record], k: int):
+        """Undo the placements of positions k.. (as given by records), newest first."""
+        packer = self.packer
+        for bin, _, _ in reversed(records[k:]):
+            if bin is None:
+                packer.unfit_items.pop()
+                continue
+            bin.pop_item()
+            # Catalog bins are opened in sequence order, so an emptied one is the last
+            if not bin.items and bin.bin_type is not None:
+                packer.bins.pop()
+                bin.bin_type.opened -= 1
+        packer._open_bins = list(packer.bins)
+
+    def _replay(self, items: List[Item], records: List[Record]):
+        """Put known placements back without searching."""
+        packer = self.packer
+        for item, (bin, rotation, position) in zip(items, records):
+            if bin is None:
+                packer.unfit_items.append(item)
+                continue
+            if not bin.items and bin.bin_type is not None:
+                # A catalog bin that the rewind closed; reopen it
+                packer.bins.append(bin)
+                packer._open_bins.append(bin)
+                bin.bin_type.opened += 1
+            item.rotation_type = rotation
+            item.position = list(position)
+            bin._add(item)
+
+    def _records(self, items: List[Item], before: dict) -> List[Record]:
+        # Placements of freshly packed items: whatever each bin gained beyond
+        # the item count it had before (`before`, by bin id)
+        where = {}
+        for bin in self.packer.bins:
+            for item in bin.items[before.get(id(bin), 0):]:
+                where[id(item)] = bin
+        return [(where[id(item)], item.rotation_type, list(item.position)) if id(item) in where
+                else (None, 0, None) for item in items]
+
+    @staticmethod
+    def _score(packer: Packer) -> tuple:
+        # Lower is better: unfit items, bins used, then how unevenly bins are
+        # filled (-sum of squared fill ratios rewards nearly emptying a bin)
+        used = [b for b in packer.bins if b.items]
+        fill = sum((b.used_volume / b.get_volume()) ** 2 for b in used if b.get_volume() > 0)
+        return (len(packer.unfit_items), len(used), -fill / (len(used) + 1))
+
+    def _energy(self, score: tuple) -> float:
+        # Scalar form of the score for the acceptance rule; one unfit item always
+        # outweighs any number of bins, one bin any fill pattern
+        return score[0] * (len(self.items) + 1) + score[1] + score[2]
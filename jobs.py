@@ -0,0 +1,96 @@
+import threading
+import time
+from typing import Callable, List, Optional
+
+from packer import Bin, Packer
+
+
+class PackJob:
+    """Runs a packing call on a daemon worker thread, with progress and cancellation.
+
+    `run` is called with the packer once the job starts, e.g.
+    `lambda p: p.pack()` or `lambda p: cache.pack(p)`; it must go through
+    Packer.pack, whose progress callback the job installs. The packer's bins
+    can be read while the job runs: bins no longer open for placement are
+    complete.
+
+    The owner (a UI polling the job) calls heartbeat() regularly. If no
+    heartbeat arrives for heartbeat_timeout seconds, the job cancels itself
+    at the next placed item, so a closed browser tab does not leave the
+    search running.
+    """
+    def __init__(self, packer: Packer, run: Callable[[Packer], object], heartbeat_timeout: float = 30.0):
+        self.packer = packer
+        self.heartbeat_timeout = heartbeat_timeout
+        self.placed = 0
+        self.total = len(packer.items)
+        self.current_bin: Optional[Bin] = None
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._run = run
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._last_heartbeat = time.monotonic()
+        self._thread = threading.Thread(target=self._work, name='pack-job', daemon=True)
+
+    def start(self) -> 'PackJob':
+        self.started_at = time.monotonic()
+        self.heartbeat()
+        self._thread.start()
+        return self
+
+    def heartbeat(self):
+        self._last_heartbeat = time.monotonic()
+
+    def cancel(self):
+        """Ask the job to stop after the item being placed; placed bins are kept."""
+        self._cancel.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.packer.cancelled
+
+    @property
+    def fraction(self) -> float:
+        return self.placed / self.total if self.total else 1.0
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def completed_bins(self) -> List[Bin]:
+        """Bins that will receive no more items (all bins once the job is done)."""
+        bins = list(self.packer.bins)
+        if self.done:
+            return bins
+        open_bins = {id(b) for b in self.packer._open_bins}
+        return [b for b in bins if id(b) not in open_bins]
+
+    def _progress(self, placed: int, total: int, bin: Optional[Bin]) -> bool:
+        self.placed, self.total, self.current_bin = placed, total, bin
+        if time.monotonic() - self._last_heartbeat > self.heartbeat_timeout:
+            # Nobody is watching any more
+            self._cancel.set()
+        return not self._cancel.is_set()
+
+    def _work(self):
+        self.packer.progress = self._progress
+        try:
+            self.result = self._run(self.packer)
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.packer.progress = None
+            self.finished_at = time.monotonic()
+            self._done.set()
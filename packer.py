@@ -1,26 +1,51 @@
-from decimal import Decimal
-from typing import List, Tuple
+import heapq
+import json
+import random
+import time
+from bisect import insort
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from bounds import lower_bound, packable
 
 class Item:
-    def __init__(self, name: str, width: float, height: float, depth: float, weight: float = 0):
+    __slots__ = ('name', 'width', 'height', 'depth', 'weight', 'max_load', 'fragile', 'rotation_type',
+                 'position', 'flg_unfitted', 'orientations', '_dimensions')
+
+    def __init__(self, name: str, width: float, height: float, depth: float, weight: float = 0,
+                 max_load: float = 0, fragile: bool = False):
         self.name = name
         self.width = width
         self.height = height
         self.depth = depth
         self.weight = weight
+        # Most weight that may rest on top (0 = unlimited); nothing at all on fragile items
+        self.max_load = max_load
+        self.fragile = fragile
         self.rotation_type = 0
         self.position = [0, 0, 0]
         self.flg_unfitted = False
+        self._build_orientations()
 
-    def get_dimension(self) -> List[float]:
+    def _build_orientations(self):
+        # Dimensions per rotation type, computed once instead of on every call
+        w, h, d = self.width, self.height, self.depth
+        self._dimensions = ((w, h, d), (w, d, h), (h, w, d), (h, d, w), (d, w, h), (d, h, w))
+        # Rotations giving the same dimensions as an earlier one are skipped:
+        # a cube has a single orientation, a square-based box three
+        orientations = []
+        seen = set()
+        for rotation, dims in enumerate(self._dimensions):
+            if dims not in seen:
+                seen.add(dims)
+                orientations.append((rotation, dims))
+        self.orientations: Tuple[Tuple[int, Tuple[float, float, float]], ...] = tuple(orientations)
+
+    def get_dimension(self) -> Tuple[float, float, float]:
         # Based on rotation type, return dimensions
-        if self.rotation_type == 0: return [self.width, self.height, self.depth]
-        elif self.rotation_type == 1: return [self.width, self.depth, self.height]
-        elif self.rotation_type == 2: return [self.height, self.width, self.depth]
-        elif self.rotation_type == 3: return [self.height, self.depth, self.width]
-        elif self.rotation_type == 4: return [self.depth, self.width, self.height]
-        elif self.rotation_type == 5: return [self.depth, self.height, self.width]
-        return [self.width, self.height, self.depth]
+        return self._dimensions[self.rotation_type]
 
     def get_volume(self) -> float:
         return self.width * self.height * self.depth
@@ -28,8 +53,375 @@ class Item:
     def string(self) -> str:
         return f"{self.name}({self.width}x{self.height}x{self.depth})"
 
+    def limits_load(self) -> bool:
+        return self.fragile or self.max_load > 0
+
+class SpatialGrid:
+    """Uniform grid over a bin volume for fast overlap queries.
+
+    Every cell keeps the items whose box touches it, so a query only visits
+    items stored in the cells covered by the query box instead of the whole bin.
+    """
+    def __init__(self, width: float, height: float, depth: float, cells: int = 8):
+        self.cells = cells
+        self.size = (max(width / cells, 1e-9), max(height / cells, 1e-9), max(depth / cells, 1e-9))
+        self.buckets: Dict[Tuple[int, int, int], List[Item]] = {}
+
+    def _cells(self, pos: List[float], dim: List[float]) -> List[Tuple[int, int, int]]:
+        # Cells covered by [pos, pos + dim); a box ending exactly on a cell border
+        # also lists the next cell, which is harmless since callers re-check overlap
+        last = self.cells - 1
+        sx, sy, sz = self.size
+        xs = range(max(int(pos[0] // sx), 0), min(int((pos[0] + dim[0]) // sx), last) + 1)
+        ys = range(max(int(pos[1] // sy), 0), min(int((pos[1] + dim[1]) // sy), last) + 1)
+        zs = range(max(int(pos[2] // sz), 0), min(int((pos[2] + dim[2]) // sz), last) + 1)
+        return [(cx, cy, cz) for cx in xs for cy in ys for cz in zs]
+
+    def insert(self, item: Item):
+        for key in self._cells(item.position, item.get_dimension()):
+            self.buckets.setdefault(key, []).append(item)
+
+    def remove(self, item: Item):
+        for key in self._cells(item.position, item.get_dimension()):
+            bucket = self.buckets[key]
+            # Usually the most recent entry, so try the cheap pop first
+            if bucket[-1] is item:
+                bucket.pop()
+            else:
+                bucket.remove(item)
+
+    def query(self, pos: List[float], dim: List[float]) -> Iterator[Item]:
+        """Yield each stored item that may overlap the box at pos with size dim."""
+        buckets = self.buckets
+        seen = set()
+        for key in self._cells(pos, dim):
+            bucket = buckets.get(key)
+            if not bucket:
+                continue
+            for item in bucket:
+                if id(item) not in seen:
+                    seen.add(id(item))
+                    yield item
+
+class ContactGraph:
+    """Which placed items of a bin rest on which, and the weight each carries.
+
+    An item passes its own weight plus its load down to the items it rests
+    on, split by contact area. Each placement records its contacts once and
+    pushes only the change in load through the items below it, so reading a
+    load is a dict lookup instead of a scan of the bin. remove_last undoes
+    the latest add exactly, for Bin.pop_item.
+
+    Nothing is recorded until the first item with a load limit arrives (or a
+    check asks for one); the graph is then built from the bin's items, so
+    loads without limits pay nothing for it.
+    """
+    def __init__(self, bin: 'Bin'):
+        self.bin = bin
+        # id(item) -> [(item below, contact area)] and weight resting on item
+        self.supports: Dict[int, List[Tuple[Item, float]]] = {}
+        self.load: Dict[int, float] = {}
+        # Placed items with a load limit; while there are none, checks are free
+        self.constrained = 0
+        # False until contacts are needed; adds before that are not recorded
+        self.active = False
+        # One entry per add: (item, [(item above, its supports before)]), None while inactive
+        self._journal: List[Tuple[Item, List[Tuple[Item, List[Tuple[Item, float]]]]]] = []
+
+    def load_on(self, item: Item) -> float:
+        return self.load.get(id(item), 0.0)
+
+    def supported_area(self, item: Item) -> float:
+        """Footprint area of item (at its position) resting on placed items."""
+        return sum(area for _, area in self._touching(item, item.position[1], False))
+
+    def checks(self, item: Item) -> bool:
+        """True if placing item could break a load limit, so allows() must be asked."""
+        return self.constrained > 0 or item.limits_load()
+
+    def allows(self, item: Item) -> bool:
+        """True if item, at its current position and rotation, overloads nothing."""
+        if not self.checks(item):
+            return True
+        carrying = self.add(item)
+        ok = all(not other.fragile and (other.max_load <= 0 or self.load[id(other)] <= other.max_load + 1e-9)
+                 for other in carrying)
+        self.remove_last()
+        return ok
+
+    def track(self, adding: Optional[Item] = None):
+        """Start recording contacts, replaying the bin's items (except adding, on its way in)."""
+        if self.active:
+            return
+        self.active = True
+        self._journal = []
+        placed = set()
+        for other in self.bin.items:
+            if other is adding:
+                continue
+            self._record(other, placed)
+            placed.add(id(other))
+
+    def add(self, item: Item) -> List[Item]:
+        """Record item's contacts and update the loads; returns the items that now carry more."""
+        if not self.active:
+            if not item.limits_load():
+                self._journal.append(None)
+                return []
+            self.track(item)
+        return self._record(item)
+
+    def _record(self, item: Item, placed: Optional[set] = None) -> List[Item]:
+        # add() proper; with placed, only those items (by id) count as contacts
+        pos, dim = item.position, item.get_dimension()
+        below = self._touching(item, pos[1], False, placed) if pos[1] > 1e-9 else []
+        above = self._touching(item, pos[1] + dim[1], True, placed)
+        key = id(item)
+        self.supports[key] = []
+        self.load[key] = 0.0
+        pending: Dict[int, list] = {}
+        self._resplit(item, below, pending)
+        changed = []
+        for other, area in above:
+            # Something placed earlier rests on item too (item went in under it)
+            old = self.supports[id(other)]
+            changed.append((other, old))
+            self._resplit(other, old + [(item, area)], pending)
+        self._journal.append((item, changed))
+        if item.limits_load():
+            self.constrained += 1
+        carrying = [other for other, _ in below]
+        if above:
+            carrying.append(item)
+        return carrying + self._flow(pending)
+
+    def remove_last(self):
+        entry = self._journal.pop()
+        if entry is None:
+            return
+        item, changed = entry
+        pending: Dict[int, list] = {}
+        self._resplit(item, [], pending)
+        for other, old in reversed(changed):
+            self._resplit(other, old, pending)
+        self._flow(pending)
+        del self.supports[id(item)], self.load[id(item)]
+        if item.limits_load():
+            self.constrained -= 1
+
+    def _touching(self, item: Item, level: float, above: bool,
+                  placed: Optional[set] = None) -> List[Tuple[Item, float]]:
+        # Placed items with their bottom (above) or top (below) at level that
+        # share footprint area with item
+        pos, dim = item.position, item.get_dimension()
+        index = self.bin.index
+        near = index.query([pos[0], level - 1e-9, pos[2]], [dim[0], 2e-9, dim[2]]) if index is not None else self.bin.items
+        found = []
+        for other in near:
+            if other is item or (placed is not None and id(other) not in placed):
+                continue
+            p, d = other.position, other.get_dimension()
+            if abs((p[1] if above else p[1] + d[1]) - level) > 1e-9:
+                continue
+            ox = min(pos[0] + dim[0], p[0] + d[0]) - max(pos[0], p[0])
+            oz = min(pos[2] + dim[2], p[2] + d[2]) - max(pos[2], p[2])
+            if ox > 1e-9 and oz > 1e-9:
+                found.append((other, ox * oz))
+        return found
+
+    def _resplit(self, item: Item, supports: List[Tuple[Item, float]], pending: Dict[int, list]):
+        # Move the weight item passes down from its current supports to new ones
+        weight = item.weight + self.load[id(item)]
+        for sign, contacts in ((-1, self.supports[id(item)]), (1, supports)):
+            total = sum(area for _, area in contacts)
+            for other, area in contacts:
+                entry = pending.setdefault(id(other), [other, 0.0])
+                entry[1] += sign * weight * area / total
+        self.supports[id(item)] = supports
+
+    def _flow(self, pending: Dict[int, list]) -> List[Item]:
+        # Apply load changes from the top down: everything resting on an item
+        # lies higher, so it has reported before the item is taken off the heap
+        heap = [(-other.position[1], key) for key, (other, _) in pending.items()]
+        heapq.heapify(heap)
+        grown = []
+        while heap:
+            _, key = heapq.heappop(heap)
+            item, delta = pending.pop(key)
+            self.load[key] += delta
+            if delta > 1e-12:
+                grown.append(item)
+            supports = self.supports[key]
+            total = sum(area for _, area in supports)
+            for other, area in supports:
+                entry = pending.get(id(other))
+                if entry is None:
+                    entry = pending[id(other)] = [other, 0.0]
+                    heapq.heappush(heap, (-other.position[1], id(other)))
+                entry[1] += delta * area / total
+        return grown
+
+# Item sort keys for Packer.pack (items are sorted descending when bigger_first)
+SORT_KEYS: Dict[str, Callable[[Item], float]] = {
+    'volume': lambda i: i.get_volume(),
+    'longest_edge': lambda i: max(i.width, i.height, i.depth),
+    'base_area': lambda i: i.width * i.depth,
+    'weight': lambda i: i.weight,
+    'height': lambda i: i.height,
+}
+
+# Pivot orderings for ExtremePoints; equal keys keep insertion order
+PIVOT_ORDERS: Dict[str, Callable[[List[float]], tuple]] = {
+    'distance': lambda p: (p[0]**2 + p[1]**2 + p[2]**2,),  # Closest to the origin
+    'bottom_left': lambda p: (p[1], p[0], p[2]),            # Floor first, then width
+    'back_bottom': lambda p: (p[2], p[1], p[0]),            # Fill from the back wall
+}
+
+# Placement engines: 'pivot' tries extreme points, 'heightmap' drops items onto
+# the load's top surface with a minimum supported area (see heightmap.py)
+ENGINES = ('pivot', 'heightmap')
+
+class ExtremePoints:
+    """Candidate pivots of a bin, kept sorted by distance to the origin (or by
+    another rule from PIVOT_ORDERS).
+
+    Points are added as items are placed (right, top and front corner of each
+    item). Duplicates, points outside the bin and points inside a placed box are
+    dropped, so Packer.pack only tries live pivots and never has to re-sort.
+    """
+    def __init__(self, bin: 'Bin'):
+        self.bin = bin
+        self._entries: List[Tuple[tuple, int, List[float]]] = []
+        self._seen = set()
+        self._seq = 0
+        self.order = 'distance'
+        # Largest room left along each axis from any live pivot; every
+        # placement starts at a pivot, so no item longer than this can fit
+        self.max_extent = [0, 0, 0]
+        self.add([0, 0, 0])
+
+    def __iter__(self) -> Iterator[List[float]]:
+        for entry in self._entries:
+            yield entry[2]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def set_order(self, name: str):
+        """Switch to another rule from PIVOT_ORDERS and re-sort the live pivots."""
+        self.order = name
+        key = PIVOT_ORDERS[name]
+        self._entries = sorted((key(e[2]), e[1], e[2]) for e in self._entries)
+
+    def _covered(self, point: List[float]) -> bool:
+        # A pivot inside a placed box can never host an item
+        neighbours = self.bin.index.query(point, (0, 0, 0)) if self.bin.index is not None else self.bin.items
+        for item in neighbours:
+            p = item.position
+            d = item.get_dimension()
+            if (p[0] <= point[0] < p[0] + d[0] and
+                p[1] <= point[1] < p[1] + d[1] and
+                p[2] <= point[2] < p[2] + d[2]):
+                return True
+        return False
+
+    def add(self, point: List[float]) -> Optional[tuple]:
+        # Returns the point's key if it was not seen before (for undo)
+        key = (point[0], point[1], point[2])
+        if key in self._seen:
+            return None
+        self._seen.add(key)
+        if point[0] >= self.bin.width or point[1] >= self.bin.height or point[2] >= self.bin.depth:
+            return key
+        if self._covered(point):
+            return key
+        # The sequence number keeps the original insertion order among equal distances
+        insort(self._entries, (PIVOT_ORDERS[self.order](point), self._seq, point))
+        self._seq += 1
+        self._grow_extent(point)
+        return key
+
+    def _grow_extent(self, point: List[float]):
+        extent = self.max_extent
+        extent[0] = max(extent[0], self.bin.width - point[0])
+        extent[1] = max(extent[1], self.bin.height - point[1])
+        extent[2] = max(extent[2], self.bin.depth - point[2])
+
+    def update(self, item: Item) -> tuple:
+        """Drop pivots covered by a newly placed item and add its three corners."""
+        return self.update_box(item.position, item.get_dimension())
+
+    def update_box(self, p: List[float], d: List[float]) -> tuple:
+        """Same as update for an arbitrary filled box, e.g. a block of items.
+
+        Returns a journal entry that undo() uses to restore the previous state.
+        """
+        x1, y1, z1 = p[0] + d[0], p[1] + d[1], p[2] + d[2]
+        kept = []
+        removed = []
+        for e in self._entries:
+            if p[0] <= e[2][0] < x1 and p[1] <= e[2][1] < y1 and p[2] <= e[2][2] < z1:
+                removed.append(e)
+            else:
+                kept.append(e)
+        self._entries = kept
+        journal = (removed, self.max_extent, self._seq, [])
+        self.max_extent = [0, 0, 0]
+        for e in self._entries:
+            self._grow_extent(e[2])
+        live = len(self._entries)
+        for corner in ([x1, p[1], p[2]],  # Right
+                       [p[0], y1, p[2]],  # Top
+                       [p[0], p[1], z1]): # Front
+            key = self.add(corner)
+            if key is not None:
+                journal[3].append(key)
+        stats = self.bin.stats
+        if stats is not None:
+            stats.pivots_generated += 3
+            stats.pivots_pruned += 3 - (len(self._entries) - live) + len(removed)
+        return journal
+
+    def undo(self, journal: tuple):
+        """Revert the most recent update/update_box that is not undone yet."""
+        removed, max_extent, seq, keys = journal
+        self._entries = [e for e in self._entries if e[1] < seq]
+        for e in removed:
+            insort(self._entries, e)
+        self._seen.difference_update(keys)
+        self._seq = seq
+        self.max_extent = max_extent
+
+class PlacementArrays:
+    """Struct-of-arrays copy of a bin's placements (positions and oriented dims).
+
+    Rows are appended in placement order; capacity doubles when full so the
+    arrays are not reallocated for every item.
+    """
+    def __init__(self, capacity: int = 64):
+        self.count = 0
+        self._positions = np.zeros((capacity, 3), dtype=np.float64)
+        self._dims = np.zeros((capacity, 3), dtype=np.float64)
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self._positions[:self.count]
+
+    @property
+    def dims(self) -> np.ndarray:
+        return self._dims[:self.count]
+
+    def append(self, position: List[float], dim: List[float]):
+        if self.count == len(self._positions):
+            self._positions = np.concatenate([self._positions, np.zeros_like(self._positions)])
+            self._dims = np.concatenate([self._dims, np.zeros_like(self._dims)])
+        self._positions[self.count] = position
+        self._dims[self.count] = dim
+        self.count += 1
+
 class Bin:
-    def __init__(self, name: str, width: float, height: float, depth: float, max_weight: float = 0):
+    def __init__(self, name: str, width: float, height: float, depth: float, max_weight: float = 0,
+                 use_index: bool = True):
         self.name = name
         self.width = width
         self.height = height
@@ -37,12 +429,56 @@ class Bin:
         self.max_weight = max_weight
         self.items: List[Item] = []
         self.unfitted_items: List[Item] = []
+        # Catalog type this bin was opened from (None for bins added directly)
+        self.bin_type: Optional['BinType'] = None
+        # Shared PackStats of the packer working on this bin, if any
+        self.stats: Optional['PackStats'] = None
+        # Running totals, updated on every placement
+        self.used_volume = 0
+        self.total_weight = 0
+        # Overlap checks go through the grid; use_index=False keeps the plain
+        # linear scan over self.items as a reference mode
+        self.index = SpatialGrid(width, height, depth) if use_index else None
+        self.extreme_points = ExtremePoints(self)
+        self.contacts = ContactGraph(self)
+        # One pivot journal entry per placed item (None inside a block), for pop_item
+        self._journal: List[Optional[tuple]] = []
+        self.arrays = PlacementArrays()
+        # Floor heightmap of the heightmap engine, built on first use
+        self.heightmap: Optional['HeightMap'] = None
 
     def get_volume(self) -> float:
         return self.width * self.height * self.depth
 
     def get_total_weight(self) -> float:
-        return sum([i.weight for i in self.items])
+        return self.total_weight
+
+    def is_full(self, min_volume: float, min_dimension: float, min_weight: float) -> bool:
+        """True if no item at least this small/light can ever be added again."""
+        if self.max_weight > 0 and self.total_weight + min_weight > self.max_weight:
+            return True
+        if self.used_volume + min_volume > self.get_volume() * (1 + 1e-9):
+            return True
+        return min_dimension > max(self.extreme_points.max_extent)
+
+    def can_hold(self, item: Item) -> bool:
+        """Constant-time check that rules out bins which obviously cannot take item.
+
+        False means no pivot/rotation can work (weight, free volume or the
+        largest free extent per axis is exceeded); True still needs a search.
+        """
+        if self.max_weight > 0 and self.total_weight + item.weight > self.max_weight:
+            if self.stats is not None:
+                self.stats.weight_rejections += 1
+            return False
+        if self.used_volume + item.get_volume() <= self.get_volume() * (1 + 1e-9):
+            ex, ey, ez = self.extreme_points.max_extent
+            for _, d in item.orientations:
+                if d[0] <= ex and d[1] <= ey and d[2] <= ez:
+                    return True
+        if self.stats is not None:
+            self.stats.bound_rejections += 1
+        return False
 
     def put_item(self, item: Item, pivot: List[float]) -> bool:
         valid_item_position = item.position[:] # Copy
@@ -55,22 +491,189 @@ class Bin:
             pivot[1] + d[1] <= self.height and
             pivot[2] + d[2] <= self.depth
         ):
-            # Check for overlap
-            for current_item in self.items:
+            # Check for overlap (only nearby items when the grid index is on)
+            stats = self.stats
+            neighbours = self.index.query(pivot, d) if self.index is not None else self.items
+            tested = 0
+            for current_item in neighbours:
+                tested += 1
                 if self._intersect(current_item, item):
+                    if stats is not None:
+                        stats.intersect_calls += tested
                     item.position = valid_item_position
                     return False
+            if stats is not None:
+                stats.intersect_calls += tested
                     
             if self.max_weight > 0 and self.get_total_weight() + item.weight > self.max_weight:
+                if stats is not None:
+                    stats.weight_rejections += 1
+                item.position = valid_item_position
+                return False
+
+            if not self.contacts.allows(item):
+                if stats is not None:
+                    stats.load_rejections += 1
                 item.position = valid_item_position
                 return False
                 
-            self.items.append(item)
+            self._add(item)
             return True
             
         item.position = valid_item_position
         return False
 
+    def _add(self, item: Item, update_points: bool = True):
+        # Register an already validated placement with every per-bin structure.
+        # Block placement skips the pivot update and does it once for the block.
+        self.items.append(item)
+        self.used_volume += item.get_volume()
+        self.total_weight += item.weight
+        self.contacts.add(item)
+        if self.index is not None:
+            self.index.insert(item)
+        self._journal.append(self.extreme_points.update(item) if update_points else None)
+        self.arrays.append(item.position, item.get_dimension())
+
+    def pop_item(self) -> Item:
+        """Remove the most recently placed item and restore the state from before it.
+
+        Items of a block share one pivot update, kept on the block's last item.
+        Popping only part of a block therefore restores the pivots from before
+        the whole block; placements stay valid since put_item checks overlap.
+        """
+        item = self.items.pop()
+        journal = self._journal.pop()
+        self.used_volume -= item.get_volume()
+        self.total_weight -= item.weight
+        self.contacts.remove_last()
+        if self.index is not None:
+            self.index.remove(item)
+        if journal is not None:
+            self.extreme_points.undo(journal)
+        self.arrays.count -= 1
+        # A heightmap cannot be lowered in place; rebuild it when next needed
+        self.heightmap = None
+        return item
+
+    def is_free(self, pos: List[float], dim: List[float]) -> bool:
+        """True if the box at pos with size dim overlaps no placed item."""
+        neighbours = self.index.query(pos, dim) if self.index is not None else self.items
+        for other in neighbours:
+            p = other.position
+            d = other.get_dimension()
+            if (pos[0] < p[0] + d[0] and pos[0] + dim[0] > p[0] and
+                pos[1] < p[1] + d[1] and pos[1] + dim[1] > p[1] and
+                pos[2] < p[2] + d[2] and pos[2] + dim[2] > p[2]):
+                return False
+        return True
+
+    def block_counts(self, pivot: List[float], dims: Tuple[float, float, float], limit: int) -> Optional[Tuple[int, int, int]]:
+        """Largest free nx x ny x nz block of boxes sized dims at pivot, or None.
+
+        The block holds at most limit boxes and at least two.
+        """
+        ny = min(int((self.height - pivot[1]) // dims[1]), limit)
+        if ny < 1:
+            return None
+        nx = min(int((self.width - pivot[0]) // dims[0]), limit // ny)
+        if nx < 1:
+            return None
+        nz = min(int((self.depth - pivot[2]) // dims[2]), limit // (nx * ny))
+        if nz < 1:
+            return None
+
+        counts = [nx, ny, nz]
+        while counts[0] * counts[1] * counts[2] > 1:
+            extent = (counts[0] * dims[0], counts[1] * dims[1], counts[2] * dims[2])
+            if self.is_free(pivot, extent):
+                return counts[0], counts[1], counts[2]
+            # Halve the axis with the most boxes and try again
+            axis = max(range(3), key=lambda a: counts[a])
+            counts[axis] = (counts[axis] + 1) // 2 if counts[axis] > 1 else 1
+        return None
+
+    def find_position(self, item: Item, chunk_size: int = 1 << 20) -> Optional[Tuple[List[float], int]]:
+        """Vectorized search for the first feasible (pivot, rotation) of item.
+
+        Tests every extreme point against all distinct rotations and all placed boxes
+        in batched NumPy operations. Candidates are ordered pivot first, then
+        rotation, so the result matches the put_item loop in Packer.pack.
+        Returns None when the item fits nowhere in this bin.
+        """
+        if self.max_weight > 0 and self.get_total_weight() + item.weight > self.max_weight:
+            if self.stats is not None:
+                self.stats.weight_rejections += 1
+            return None
+        pivots = list(self.extreme_points)
+        if not pivots:
+            return None
+
+        orientations = item.orientations
+        r = len(orientations)
+        P = np.asarray(pivots, dtype=np.float64)                              # (p, 3)
+        R = np.asarray([dims for _, dims in orientations], dtype=np.float64)  # (r, 3)
+        lo = np.repeat(P, r, axis=0)                                          # (p*r, 3), pivot-major
+        hi = lo + np.tile(R, (len(P), 1))
+        inside = np.all(hi <= (self.width, self.height, self.depth), axis=1)
+
+        candidates = np.flatnonzero(inside)
+        box_lo = self.arrays.positions
+        box_hi = box_lo + self.arrays.dims
+        if len(box_lo) == 0:
+            hits = candidates
+        else:
+            # Test candidates in growing chunks: the first feasible one is usually
+            # near the front, and the (candidates x boxes x 3) temporary stays
+            # below about chunk_size cells
+            limit = max(chunk_size // (len(box_lo) * 3), 1)
+            step = min(64, limit)
+            start = 0
+            hits = None
+            while start < len(candidates):
+                idx = candidates[start:start + step]
+                c_lo = lo[idx]
+                c_hi = hi[idx]
+                overlap = np.less.outer(c_lo[:, 0], box_hi[:, 0])
+                for axis in range(3):
+                    if axis:
+                        overlap &= np.less.outer(c_lo[:, axis], box_hi[:, axis])
+                    overlap &= np.greater.outer(c_hi[:, axis], box_lo[:, axis])
+                free = idx[~overlap.any(axis=1)]
+                if len(free) and self.contacts.checks(item):
+                    # First overlap-free candidate that overloads nothing
+                    first = next((c for c in free if self.load_ok(item, pivots[c // r], orientations[c % r][0])), None)
+                    free = free[:0] if first is None else free[free == first]
+                if len(free):
+                    hits = free
+                    break
+                start += step
+                step = min(step * 2, limit)
+        if hits is None or len(hits) == 0:
+            if self.stats is not None:
+                self.stats.pivots_tried += len(P)
+                self.stats.rotations_tried += len(lo)
+                self.stats.intersect_calls += len(candidates) * len(box_lo)
+            return None
+
+        first = int(hits[0])
+        if self.stats is not None:
+            # Count what the scalar loop would have tried up to the hit
+            self.stats.pivots_tried += first // r + 1
+            self.stats.rotations_tried += first + 1
+            self.stats.intersect_calls += (start + len(idx) if len(box_lo) else 0) * len(box_lo)
+        return pivots[first // r][:], orientations[first % r][0]
+
+    def load_ok(self, item: Item, position: List[float], rotation: int) -> bool:
+        """Load check of a candidate placement (see ContactGraph); item is left unchanged."""
+        saved = item.position, item.rotation_type
+        item.position, item.rotation_type = list(position), rotation
+        ok = self.contacts.allows(item)
+        item.position, item.rotation_type = saved
+        if not ok and self.stats is not None:
+            self.stats.load_rejections += 1
+        return ok
+
     def _intersect(self, i1: Item, i2: Item) -> bool:
         d1 = i1.get_dimension()
         d2 = i2.get_dimension()
@@ -89,73 +692,740 @@ class Bin:
             p1[2] < p2[2] + d2[2] and p1[2] + d1[2] > p2[2]
         )
 
-class Packer:
+class PackStats:
+    """Counters and timers filled in by Packer.pack when Packer(stats=True).
+
+    Bins report into the same object, so one instance covers a whole run.
+    Disabled stats (the default) cost a single `is None` check per hook.
+    """
     def __init__(self):
+        self.pivots_generated = 0   # Corner points proposed by placements
+        self.pivots_pruned = 0      # ... dropped as duplicate, outside or covered
+        self.pivots_tried = 0
+        self.rotations_tried = 0
+        self.intersect_calls = 0
+        self.weight_rejections = 0  # Bin or placement refused by max_weight
+        self.bound_rejections = 0   # Bin skipped by the volume / free extent bound
+        self.load_rejections = 0    # Placement refused by max_load / fragile below
+        self.bins_opened = 0
+        self.blocks_placed = 0
+        self.bin_time: Dict[str, float] = {}
+        self.item_time: List[Tuple[str, float]] = []
+        self.total_time = 0.0
+
+    def to_dict(self, slowest: int = 20) -> dict:
+        """Plain-data summary; per-item times are reduced to the slowest few."""
+        item_total = sum(t for _, t in self.item_time)
+        return {
+            'pivots_generated': self.pivots_generated,
+            'pivots_pruned': self.pivots_pruned,
+            'pivots_tried': self.pivots_tried,
+            'rotations_tried': self.rotations_tried,
+            'intersect_calls': self.intersect_calls,
+            'weight_rejections': self.weight_rejections,
+            'bound_rejections': self.bound_rejections,
+            'load_rejections': self.load_rejections,
+            'bins_opened': self.bins_opened,
+            'blocks_placed': self.blocks_placed,
+            'total_time': self.total_time,
+            'bin_time': dict(self.bin_time),
+            'items_timed': len(self.item_time),
+            'item_time_total': item_total,
+            'item_time_mean': item_total / len(self.item_time) if self.item_time else 0,
+            'slowest_items': sorted(self.item_time, key=lambda x: -x[1])[:slowest],
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+class RepackReport:
+    """What one incremental update (Packer.add_items, remove_items, change_quantity) did."""
+    def __init__(self):
+        self.placed: List[Item] = []    # New or previously unfit items now in a bin
+        self.moved: List[Item] = []     # Items already placed whose bin or position changed
+        self.removed: List[Item] = []
+        self.unfit: List[Item] = []     # Items of this update left without a place
+        self.bins_touched = 0
+
+    def to_dict(self) -> dict:
+        return {
+            'placed': [i.name for i in self.placed],
+            'moved': [i.name for i in self.moved],
+            'removed': [i.name for i in self.removed],
+            'unfit': [i.name for i in self.unfit],
+            'bins_touched': self.bins_touched,
+        }
+
+class BinType:
+    """A container model from which Packer opens bins on demand.
+
+    limit caps how many instances may be opened (None means unlimited).
+    """
+    def __init__(self, name: str, width: float, height: float, depth: float, max_weight: float = 0,
+                 limit: Optional[int] = None):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.max_weight = max_weight
+        self.limit = limit
+        self.opened = 0
+
+    def get_volume(self) -> float:
+        return self.width * self.height * self.depth
+
+    def can_open(self) -> bool:
+        return self.limit is None or self.opened < self.limit
+
+    def fits(self, item: Item) -> bool:
+        """True if item fits in an empty instance of this type."""
+        if self.max_weight > 0 and item.weight > self.max_weight:
+            return False
+        for _, d in item.orientations:
+            if d[0] <= self.width and d[1] <= self.height and d[2] <= self.depth:
+                return True
+        return False
+
+    def new_bin(self) -> Bin:
+        self.opened += 1
+        bin = Bin(f"{self.name} #{self.opened}", self.width, self.height, self.depth, self.max_weight)
+        bin.bin_type = self
+        return bin
+
+class Packer:
+    def __init__(self, stats: bool = False):
+        # Profiling counters, None unless requested (see PackStats)
+        self.stats: Optional[PackStats] = PackStats() if stats else None
         self.bins: List[Bin] = []
+        self.bin_types: List[BinType] = []
         self.items: List[Item] = []
         self.unfit_items: List[Item] = []
+        # Bins still worth scanning during pack; full ones are dropped
+        self._open_bins: List[Bin] = []
+        # (volume, smallest dimension, weight) minima over the items not yet placed
+        self._remaining_min = (0, 0, 0)
+        self._pivot_order = 'distance'
+        # Placement engine and, for 'heightmap', the supported footprint share
+        self._engine = 'pivot'
+        self._min_support = 0.75
+        # Item order and options of the last pack, reused by incremental updates
+        self._item_order: Tuple[str, bool] = ('volume', True)
+        self._pack_options = {'distribute_items': False, 'vectorized': False}
+        # Resolution of the last pack in fixed-point mode, None for float geometry
+        self._resolution: Optional[float] = None
+        # Order in which pack processed the items (input to the improvement stage)
+        self._sequence: List[Item] = []
+        # Lower bound on bins needed, and items that fit no container at all
+        self.lower_bound = 0
+        self._unpackable = 0
+        # Optional callback progress(placed, total, current_bin) called after
+        # each item during pack; returning False stops the run early, leaving
+        # the remaining items unpacked and cancelled set
+        self.progress: Optional[Callable[[int, int, Optional[Bin]], Optional[bool]]] = None
+        self.cancelled = False
 
     def add_bin(self, bin: Bin):
         self.bins.append(bin)
 
+    def add_bin_type(self, bin_type: BinType):
+        """Register a container type; pack opens instances only when needed."""
+        self.bin_types.append(bin_type)
+
     def add_item(self, item: Item):
         self.items.append(item)
 
-    def pack(self, bigger_first=True, distribute_items=False):
+    def pack(self, bigger_first=True, distribute_items=False, vectorized=False, block_building=False,
+             sort_key='volume', pivot_order='distance', seed=None, improve=0, resolution=None,
+             engine='pivot', min_support=0.75):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of: {', '.join(ENGINES)}")
+        if engine == 'heightmap' and block_building:
+            raise ValueError("block_building places blocks at pivots and cannot use the heightmap engine")
+        self._record_options(bigger_first=bigger_first, distribute_items=distribute_items, vectorized=vectorized,
+                             sort_key=sort_key, pivot_order=pivot_order, resolution=resolution, engine=engine,
+                             min_support=min_support)
+        # Fixed-point mode: search on integer multiples of `resolution`
+        if resolution is not None:
+            self._pack_scaled(resolution, bigger_first=bigger_first, distribute_items=distribute_items,
+                              vectorized=vectorized, block_building=block_building, sort_key=sort_key,
+                              pivot_order=pivot_order, seed=seed, improve=improve, engine=engine,
+                              min_support=min_support)
+            return
+
+        # A seed shuffles the items first, so ties in the sort key are broken
+        # in a random but reproducible order
+        if seed is not None:
+            random.Random(seed).shuffle(self.items)
+
         # Sort bins (smallest first usually, but here we iterate)
         # Sort items
-        self.items.sort(key=lambda x: x.get_volume(), reverse=bigger_first)
+        self.items.sort(key=SORT_KEYS[sort_key], reverse=bigger_first)
         self.bins.sort(key=lambda x: x.get_volume(), reverse=False) # Try smallest bin first? Or keep order? Usually fit into first bin that works.
+        self.bin_types.sort(key=lambda x: x.get_volume())
+        self._open_bins = list(self.bins)
+        for bin in self.bins:
+            bin.extreme_points.set_order(pivot_order)
+            bin.stats = self.stats
+        self.compute_lower_bound()
+        self.cancelled = False
+        started = time.perf_counter()
 
-        for item in self.items:
-            fitted = False
-            for bin in self.bins:
-                if distribute_items and fitted:
-                    break
-                
-                # Check 6 rotations
-                # This is a simplified 3D bin packing heuristic
-                # We try to place the item at every "pivot point" generated by other items
-                
-                best_orientation = -1
-                best_pivot = None
-                
-                # Available pivots: (0,0,0) initially, then for each item placed:
-                # (x+w, y, z), (x, y+h, z), (x, y, z+d)
-                
-                # Ideally, start with 0,0,0
-                # We need a robust way to find candidate positions. 
-                # A common heuristic is to try all corners of existing items + (0,0,0)
-                
-                # But to keep it simple and fast as requested ("First Fit Decreasing"):
-                # We iterate through all candidate positions (Pivots)
-                # For each pivot, try all 6 rotations.
-                
-                candidate_pivots = [[0,0,0]]
-                for i in bin.items:
-                    d = i.get_dimension()
-                    candidate_pivots.append([i.position[0] + d[0], i.position[1], i.position[2]]) # Right
-                    candidate_pivots.append([i.position[0], i.position[1] + d[1], i.position[2]]) # Top
-                    candidate_pivots.append([i.position[0], i.position[1], i.position[2] + d[2]]) # Front
-                
-                # Sort pivots? Maybe by distance to origin to pack tightly
-                candidate_pivots.sort(key=lambda p: p[0]**2 + p[1]**2 + p[2]**2)
+        if block_building:
+            self._pack_blocks(distribute_items, vectorized, self.progress)
+        else:
+            self._pack_sequence(self.items, distribute_items, vectorized, self.progress)
 
-                # Remove duplicates
-                
-                # Try to fit
-                bin_fitted = False
-                for pivot in candidate_pivots:
-                    if bin_fitted: break
-                    for rotation in range(6):
-                        item.rotation_type = rotation
-                        if bin.put_item(item, pivot):
-                            bin_fitted = True
-                            fitted = True
-                            break
-                            
-                if bin_fitted:
-                    break
-            
+        # Optional anytime improvement stage, `improve` seconds of wall clock;
+        # pointless once the bound is met
+        if improve > 0 and not self.cancelled and not self.is_optimal():
+            from improve import Improver
+            Improver(self, seed=seed or 0, distribute_items=distribute_items, vectorized=vectorized).run(improve)
+
+        if self.stats is not None:
+            self.stats.total_time += time.perf_counter() - started
+
+    def _record_options(self, bigger_first=True, distribute_items=False, vectorized=False, sort_key='volume',
+                        pivot_order='distance', resolution=None, engine='pivot', min_support=0.75, **_):
+        # Options of pack that apply_plan and incremental updates reuse; also
+        # called for plans that come from the cache without a search
+        self._pivot_order = pivot_order
+        self._engine, self._min_support = engine, min_support
+        self._item_order = (sort_key, bigger_first)
+        self._pack_options = {'distribute_items': distribute_items, 'vectorized': vectorized}
+        self._resolution = resolution
+
+    def _check_incremental(self):
+        if self._resolution is not None:
+            raise ValueError(f"Packed at resolution {self._resolution}; incremental updates search in float "
+                             f"geometry, so pack again instead")
+
+    def compute_lower_bound(self) -> int:
+        """Compute (and store in self.lower_bound) a lower bound on the bins needed."""
+        containers = self.bins + self.bin_types
+        if not containers:
+            self.lower_bound, self._unpackable = 0, len(self.items)
+            return 0
+        self._unpackable = len(self.items) - len(packable(self.items, containers))
+        self.lower_bound = lower_bound(self.items, containers)
+        return self.lower_bound
+
+    def get_bins_used(self) -> int:
+        return sum(1 for b in self.bins if b.items)
+
+    def get_gap(self) -> float:
+        """Relative optimality gap of the current result: (bins used - bound) / bound."""
+        if self.lower_bound == 0:
+            return 0.0
+        return (self.get_bins_used() - self.lower_bound) / self.lower_bound
+
+    def is_optimal(self) -> bool:
+        """True if every packable item is placed and the bin count meets the lower bound."""
+        return len(self.unfit_items) <= self._unpackable and self.get_bins_used() <= self.lower_bound
+
+    def export_plan(self, items: Optional[List[Item]] = None) -> dict:
+        """Return the packing result as plain data (JSON/pickle friendly).
+
+        Items are referenced by their index in items (default: self.items), each
+        placement as [index, rotation_type, x, y, z]. Bins opened from the
+        catalog carry the index of their type in self.bin_types.
+        """
+        index = {id(item): k for k, item in enumerate(items if items is not None else self.items)}
+        return {
+            'bins': [
+                {
+                    'name': b.name, 'width': b.width, 'height': b.height, 'depth': b.depth,
+                    'max_weight': b.max_weight,
+                    'bin_type': self.bin_types.index(b.bin_type) if b.bin_type is not None else None,
+                    'items': [[index[id(i)], i.rotation_type] + list(i.position) for i in b.items],
+                }
+                for b in self.bins
+            ],
+            'unfit': [index[id(i)] for i in self.unfit_items],
+        }
+
+    def apply_plan(self, plan: dict, items: Optional[List[Item]] = None, bins: Optional[List[Bin]] = None):
+        """Rebuild bins and placements from export_plan output without searching.
+
+        With bins (empty Bin objects), the plan's bins not opened from the
+        catalog are filled into those, in order, instead of new ones.
+        """
+        items = items if items is not None else self.items
+        fixed = iter(bins) if bins is not None else None
+        # Same type order as pack, so bin_type indices match the exporting packer
+        self.bin_types.sort(key=lambda x: x.get_volume())
+        for bin_type in self.bin_types:
+            bin_type.opened = 0
+        self.bins = []
+        for spec in plan['bins']:
+            if fixed is not None and spec.get('bin_type') is None:
+                bin = next(fixed)
+            else:
+                bin = Bin(spec['name'], spec['width'], spec['height'], spec['depth'], spec['max_weight'])
+            bin.extreme_points.set_order(self._pivot_order)
+            bin.stats = self.stats
+            if spec.get('bin_type') is not None:
+                bin.bin_type = self.bin_types[spec['bin_type']]
+                bin.bin_type.opened += 1
+            for k, rotation, x, y, z in spec['items']:
+                item = items[k]
+                item.rotation_type = rotation
+                item.position = [x, y, z]
+                bin._add(item)
+            self.bins.append(bin)
+        self._open_bins = list(self.bins)
+        self.unfit_items = [items[k] for k in plan['unfit']]
+        self._sequence = [i for b in self.bins for i in b.items] + self.unfit_items
+
+    def add_items(self, items: List[Item]) -> RepackReport:
+        """Add items to a packed result without moving anything already placed.
+
+        New items go into the free space of the current bins, in the item
+        order and with the options of the last pack, and open new bins only
+        when nothing fits. Cost grows with the number of new items. A result
+        packed with a resolution raises ValueError; pack it again instead.
+        """
+        self._check_incremental()
+        report = RepackReport()
+        sort_key, bigger_first = self._item_order
+        order = sorted(items, key=SORT_KEYS[sort_key], reverse=bigger_first)
+        self.items.extend(order)
+        touched: Dict[int, Bin] = {}
+        report.unfit = self._place_batch(order, [], touched)
+        self.unfit_items.extend(report.unfit)
+        unfit = {id(i) for i in report.unfit}
+        report.placed = [i for i in order if id(i) not in unfit]
+        report.bins_touched = len(touched)
+        self._sequence = [i for b in self.bins for i in b.items] + self.unfit_items
+        return report
+
+    def remove_items(self, items: List[Item]) -> RepackReport:
+        """Take items out of a packed result, repairing only the bins that held them.
+
+        In each such bin the items placed after the first removed one are
+        taken out and put back where they were when they still can be; an
+        item that lost its support (heightmap engine) or would now overload
+        something is placed again, first in the same bins. Space still free
+        there is then offered to unfit items. Bins from the catalog that end
+        up empty are closed. Like add_items, not for results packed with a
+        resolution.
+        """
+        self._check_incremental()
+        report = RepackReport()
+        targets = {id(i) for i in items}
+        report.removed = [i for i in self.items if id(i) in targets]
+        self.items = [i for i in self.items if id(i) not in targets]
+        self.unfit_items = [i for i in self.unfit_items if id(i) not in targets]
+
+        touched: Dict[int, Bin] = {}
+        before: Dict[int, tuple] = {}
+        displaced: List[Item] = []
+        for bin in self.bins:
+            first = next((k for k, i in enumerate(bin.items) if id(i) in targets), None)
+            if first is None:
+                continue
+            touched[id(bin)] = bin
+            tail = [bin.pop_item() for _ in range(len(bin.items) - first)]
+            for item in reversed(tail):
+                if id(item) in targets:
+                    continue
+                before[id(item)] = (bin, list(item.position), item.rotation_type)
+                if not self._restore(bin, item):
+                    displaced.append(item)
+
+        # Catalog bins left empty are given back
+        for bin in list(touched.values()):
+            if bin.bin_type is not None and not bin.items:
+                bin.bin_type.opened -= 1
+                self.bins.remove(bin)
+                del touched[id(bin)]
+        self._open_bins = [b for b in self._open_bins if b in self.bins]
+        repaired = list(touched.values())
+        for bin in repaired:
+            if bin not in self._open_bins:
+                self._open_bins.append(bin)
+
+        waiting = self.unfit_items
+        sort_key, bigger_first = self._item_order
+        displaced.sort(key=SORT_KEYS[sort_key], reverse=bigger_first)
+        report.unfit = self._place_batch(displaced, repaired, touched)
+        unfit = {id(i) for i in report.unfit}
+        for item in displaced:
+            bin, position, rotation = before[id(item)]
+            if id(item) not in unfit and (item not in bin.items or item.position != position
+                                          or item.rotation_type != rotation):
+                report.moved.append(item)
+
+        # Space still free goes to items that did not fit before, in the repaired bins only
+        repaired = [b for b in repaired if b in self._open_bins]
+        if waiting and repaired:
+            suffix_min = self._suffix_minima(waiting)
+            for k, item in enumerate(waiting):
+                self._remaining_min = suffix_min[k]
+                if self._place_in_bins(item, repaired, **self._pack_options):
+                    report.placed.append(item)
+            placed = {id(i) for i in report.placed}
+            waiting = [i for i in waiting if id(i) not in placed]
+        self.unfit_items = waiting + report.unfit
+
+        report.bins_touched = len(touched)
+        self._sequence = [i for b in self.bins for i in b.items] + self.unfit_items
+        return report
+
+    def change_quantity(self, name: str, quantity: int) -> RepackReport:
+        """Set how many items named name the result holds, adding copies or removing some.
+
+        Removal takes unfit copies first, then the most recently placed ones,
+        which leaves the least to repair.
+        """
+        same = [i for i in self.items if i.name == name]
+        if not same:
+            raise KeyError(f"No item named '{name}'")
+        if quantity < 0:
+            raise ValueError(f"quantity must not be negative, got {quantity}")
+        if quantity > len(same):
+            t = same[0]
+            return self.add_items([Item(t.name, t.width, t.height, t.depth, t.weight, t.max_load, t.fragile)
+                                   for _ in range(quantity - len(same))])
+        position = {id(item): (b, k) for b, bin in enumerate(self.bins) for k, item in enumerate(bin.items)
+                    if item.name == name}
+        # Unfit copies first, then from the last bin and the top of its order
+        same.sort(key=lambda i: position.get(id(i), (len(self.bins), 0)), reverse=True)
+        return self.remove_items(same[:len(same) - quantity])
+
+    def _restore(self, bin: Bin, item: Item) -> bool:
+        # Put a taken-out item back at its old position if it is still stable
+        # and overloads nothing there (nothing can overlap it: the bin only lost items)
+        if self._engine == 'heightmap' and item.position[1] > 1e-9:
+            w, _, d = item.get_dimension()
+            if bin.contacts.supported_area(item) < self._min_support * w * d - 1e-9:
+                return False
+        if not bin.contacts.allows(item):
+            return False
+        bin._add(item)
+        return True
+
+    def _place_batch(self, items: List[Item], preferred: List[Bin], touched: Dict[int, Bin]) -> List[Item]:
+        # Place items in order, trying preferred bins before the usual search;
+        # returns those that fit nowhere. Bins receiving items go into touched
+        suffix_min = self._suffix_minima(items)
+        if items:
+            # pack closed bins against the minima of its own items; smaller
+            # new ones may still fit there
+            self._open_bins = [b for b in self.bins if not b.is_full(*suffix_min[0])]
+        unfit = []
+        for k, item in enumerate(items):
+            self._remaining_min = suffix_min[k]
+            fitted = self._place_in_bins(item, [b for b in preferred if b in self._open_bins], **self._pack_options)
             if not fitted:
+                fitted = self._place_item(item, **self._pack_options)
+            if fitted:
+                bin = next(b for b in reversed(self.bins) if b.items and b.items[-1] is item)
+                touched[id(bin)] = bin
+            else:
+                unfit.append(item)
+        return unfit
+
+    def _pack_scaled(self, resolution: float, **pack_options):
+        """pack() on an integer copy of the instance, with the plan mapped back.
+
+        Dimensions are divided by resolution in decimal arithmetic (so 12.3 at
+        0.1 is exactly 123): items rounded up, containers rounded down. The
+        search then compares integers only, and touching faces meet exactly.
+        Rounding this way never creates overlaps or overhangs in the original
+        units, at the cost of up to one resolution step of slack per edge.
+        """
+        unit = Decimal(str(resolution))
+        if unit <= 0:
+            raise ValueError(f"resolution must be positive, got {resolution}")
+
+        def up(v: float) -> int:
+            return int((Decimal(str(v)) / unit).to_integral_value(ROUND_CEILING))
+
+        def down(v: float) -> int:
+            return int((Decimal(str(v)) / unit).to_integral_value(ROUND_FLOOR))
+
+        scaled = Packer()
+        scaled.stats = self.stats
+        scaled.progress = self.progress
+        items = [Item(i.name, up(i.width), up(i.height), up(i.depth), i.weight, i.max_load, i.fragile)
+                 for i in self.items]
+        scaled.items = list(items)
+        for b in self.bins:
+            scaled.add_bin(Bin(b.name, down(b.width), down(b.height), down(b.depth), b.max_weight,
+                               b.index is not None))
+        # pack sorts bins by volume (stably) and keeps that order, also when the
+        # improvement stage rebuilds them, so the k-th bin of the plan not from
+        # the catalog is the k-th of these
+        fixed = [self.bins[k] for k in sorted(range(len(self.bins)), key=lambda k: scaled.bins[k].get_volume())]
+        originals = {}
+        # apply_plan below uses this order for bin_type indices
+        self.bin_types.sort(key=lambda x: x.get_volume())
+        for t in self.bin_types:
+            copy = BinType(t.name, down(t.width), down(t.height), down(t.depth), t.max_weight, t.limit)
+            originals[id(copy)] = t
+            scaled.add_bin_type(copy)
+
+        scaled.pack(**pack_options)
+
+        plan = scaled.export_plan(items)
+        for spec, bin in zip(plan['bins'], scaled.bins):
+            if bin.bin_type is not None:
+                original = originals[id(bin.bin_type)]
+                spec['width'], spec['height'], spec['depth'] = original.width, original.height, original.depth
+                spec['bin_type'] = self.bin_types.index(original)
+            spec['items'] = [[k, rotation] + [float(Decimal(v) * unit) for v in (x, y, z)]
+                             for k, rotation, x, y, z in spec['items']]
+        # The caller's own bins receive the placements
+        self.apply_plan(plan, self.items, fixed)
+        self.cancelled = scaled.cancelled
+        self.compute_lower_bound()
+
+    def _pack_sequence(self, items: List[Item], distribute_items=False, vectorized=False, progress=None) -> int:
+        # Returns how many of items were handled (fewer if progress stopped the run)
+        self._sequence = list(items)
+        suffix_min = self._suffix_minima(items)
+        for k, item in enumerate(items):
+            self._remaining_min = suffix_min[k]
+            if not self._place_item(item, distribute_items, vectorized):
                 self.unfit_items.append(item)
+            if progress is not None and not self._report(progress, k + 1, len(items)):
+                return k + 1
+        return len(items)
+
+    def _report(self, progress, placed: int, total: int) -> bool:
+        # Call the progress callback; False (and cancelled set) if it asked to stop
+        if progress(placed, total, self.bins[-1] if self.bins else None) is False:
+            self.cancelled = True
+            return False
+        return True
+
+    @staticmethod
+    def _suffix_minima(items: List[Item]) -> List[Tuple[float, float, float]]:
+        # minima[k] bounds every item from position k on, so a bin that cannot
+        # take them is closed for the rest of the run
+        minima = [None] * len(items)
+        low = (float('inf'), float('inf'), float('inf'))
+        for k in range(len(items) - 1, -1, -1):
+            item = items[k]
+            low = (min(low[0], item.get_volume()),
+                   min(low[1], item.width, item.height, item.depth),
+                   min(low[2], item.weight))
+            minima[k] = low
+        return minima
+
+    def _close_full_bins(self):
+        self._open_bins = [b for b in self._open_bins if not b.is_full(*self._remaining_min)]
+
+    def _bin_type_for(self, item: Item) -> Optional[BinType]:
+        # Smallest type that can still be opened and takes item alone
+        for bin_type in self.bin_types:
+            if bin_type.can_open() and bin_type.fits(item):
+                return bin_type
+        return None
+
+    def _open_bin(self, item: Item) -> Optional[Bin]:
+        bin_type = self._bin_type_for(item)
+        if bin_type is None:
+            return None
+        bin = bin_type.new_bin()
+        bin.extreme_points.set_order(self._pivot_order)
+        bin.stats = self.stats
+        if self.stats is not None:
+            self.stats.bins_opened += 1
+        self.bins.append(bin)
+        self._open_bins.append(bin)
+        return bin
+
+    def _place_item(self, item: Item, distribute_items=False, vectorized=False) -> bool:
+        if self.stats is not None:
+            started = time.perf_counter()
+            fitted = self._place_item_untimed(item, distribute_items, vectorized)
+            self.stats.item_time.append((item.name, time.perf_counter() - started))
+            return fitted
+        return self._place_item_untimed(item, distribute_items, vectorized)
+
+    def _place_item_untimed(self, item: Item, distribute_items=False, vectorized=False) -> bool:
+        fitted = self._place_in_bins(item, self._open_bins, distribute_items, vectorized)
+        if not fitted:
+            # Nothing open can take it: open a new bin from the catalog
+            bin = self._open_bin(item)
+            if bin is not None:
+                fitted = self._place_in_bins(item, [bin], distribute_items, vectorized)
+        if fitted:
+            self._close_full_bins()
+        return fitted
+
+    def _place_in_bins(self, item: Item, bins: List[Bin], distribute_items=False, vectorized=False) -> bool:
+        stats = self.stats
+        fitted = False
+        for bin in bins:
+            if distribute_items and fitted:
+                break
+            if stats is None:
+                fitted = self._try_bin(item, bin, vectorized)
+            else:
+                started = time.perf_counter()
+                fitted = self._try_bin(item, bin, vectorized)
+                stats.bin_time[bin.name] = stats.bin_time.get(bin.name, 0) + time.perf_counter() - started
+            if fitted:
+                break
+
+        return fitted
+
+    def _try_bin(self, item: Item, bin: Bin, vectorized=False) -> bool:
+        # Check each distinct rotation
+        # This is a simplified 3D bin packing heuristic
+        # We try to place the item at every "pivot point" generated by other items
+        # ("First Fit Decreasing"): for each pivot, try each distinct rotation
+        # (rotations that repeat an earlier one's dimensions are skipped).
+        
+        # The bin keeps its pivots incrementally: (0,0,0) initially, then for
+        # each item placed (x+w, y, z), (x, y+h, z), (x, y, z+d), already
+        # deduplicated, pruned of dead points and sorted by distance to origin.
+        # The loop below returns right after a successful put_item, which is
+        # the only thing that modifies the pivot list.
+        candidate_pivots = bin.extreme_points
+
+        # Skip bins that cannot take the item before walking their pivots
+        if not bin.can_hold(item):
+            return False
+
+        stats = self.stats
+        if self._engine == 'heightmap':
+            # Lowest position with enough support under the item
+            if bin.heightmap is None:
+                from heightmap import HeightMap
+                bin.heightmap = HeightMap(bin)
+            return bin.heightmap.place(item, self._min_support)
+
+        if vectorized:
+            # Same search in one batched NumPy test per bin
+            found = bin.find_position(item)
+            if found is not None:
+                item.position, item.rotation_type = found
+                bin._add(item)
+                return True
+            return False
+
+        # Try to fit
+        for pivot in candidate_pivots:
+            if stats is not None:
+                stats.pivots_tried += 1
+            for rotation, _ in item.orientations:
+                item.rotation_type = rotation
+                if stats is not None:
+                    stats.rotations_tried += 1
+                if bin.put_item(item, pivot):
+                    return True
+
+        return False
+
+    def _pack_blocks(self, distribute_items=False, vectorized=False, progress=None):
+        # Group identical items (same name, dimensions and weight) into SKUs,
+        # keeping the order in which each SKU first appears in the sorted list
+        groups: Dict[tuple, List[Item]] = {}
+        for item in self.items:
+            key = (item.name, item.width, item.height, item.depth, item.weight)
+            groups.setdefault(key, []).append(item)
+
+        order = [item for group in groups.values() for item in group]
+        self._sequence = order
+        suffix_min = self._suffix_minima(order)
+        k = 0
+        for group in groups.values():
+            # Place the SKU as homogeneous blocks while at least two units remain,
+            # then fall back to the per-item search for what is left
+            remaining = group
+            while len(remaining) > 1:
+                self._remaining_min = suffix_min[k]
+                placed = self._place_block(remaining)
+                if not placed:
+                    break
+                remaining = remaining[placed:]
+                k += placed
+                self._close_full_bins()
+                if progress is not None and not self._report(progress, k, len(order)):
+                    return
+            for item in remaining:
+                self._remaining_min = suffix_min[k]
+                k += 1
+                if not self._place_item(item, distribute_items, vectorized):
+                    self.unfit_items.append(item)
+                if progress is not None and not self._report(progress, k, len(order)):
+                    return
+
+    def _place_block(self, items: List[Item]) -> int:
+        """Place a block of identical items as one unit; returns how many were placed.
+
+        At the first pivot of the first bin that can host at least two units, the
+        orientation giving the largest block wins. The block is grown as a column
+        (height), then a wall (width), then layers (depth), and shrunk along its
+        longest axis until it no longer overlaps placed items.
+        """
+        sample = items[0]
+        placed = self._place_block_in(items, self._open_bins)
+        if not placed:
+            # Keep a fresh bin only if it can host a block, otherwise the
+            # per-item fallback decides whether a new bin is needed
+            bin_type = self._bin_type_for(sample)
+            if bin_type is not None:
+                bin = bin_type.new_bin()
+                bin.extreme_points.set_order(self._pivot_order)
+                bin.stats = self.stats
+                placed = self._place_block_in(items, [bin])
+                if placed:
+                    if self.stats is not None:
+                        self.stats.bins_opened += 1
+                    self.bins.append(bin)
+                    self._open_bins.append(bin)
+                else:
+                    bin_type.opened -= 1
+        return placed
+
+    def _place_block_in(self, items: List[Item], bins: List[Bin]) -> int:
+        sample = items[0]
+        for bin in bins:
+            limit = len(items)
+            if bin.max_weight > 0 and sample.weight > 0:
+                limit = min(limit, int((bin.max_weight - bin.get_total_weight()) // sample.weight))
+            if limit < 2:
+                continue
+
+            if not bin.can_hold(sample):
+                continue
+
+            for pivot in bin.extreme_points:
+                best = None
+                for rotation, dims in sample.orientations:
+                    counts = bin.block_counts(pivot, dims, limit)
+                    if counts and (best is None or counts[0] * counts[1] * counts[2] > best[2]):
+                        best = (rotation, dims, counts[0] * counts[1] * counts[2], counts)
+                if best is None:
+                    continue
+
+                rotation, dims, total, (nx, ny, nz) = best
+                block = items[:total]
+                origin = pivot[:]
+                positions = [[origin[0] + ix * dims[0], origin[1] + iy * dims[1], origin[2] + iz * dims[2]]
+                             for iz in range(nz) for ix in range(nx) for iy in range(ny)]
+                check = bin.contacts.checks(sample)
+                placed = 0
+                for item, position in zip(block, positions):
+                    item.rotation_type = rotation
+                    item.position = position
+                    if check and not bin.contacts.allows(item):
+                        if self.stats is not None:
+                            self.stats.load_rejections += 1
+                        break
+                    bin._add(item, update_points=False)
+                    placed += 1
+                if placed < total:
+                    # Too heavy for what is below; take the block back
+                    for _ in range(placed):
+                        bin.pop_item()
+                    continue
+                bin._journal[-1] = bin.extreme_points.update_box(origin, (nx * dims[0], ny * dims[1], nz * dims[2]))
+                if self.stats is not None:
+                    self.stats.blocks_placed += 1
+                return total
+        return 0
@@ -0,0 +1,101 @@
+import copy
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List, Optional
+
+from packer import Item, Packer, PIVOT_ORDERS, SORT_KEYS
+
+
+def default_strategies(seed: int = 0) -> List[dict]:
+    """Every sort key combined with every pivot order, each with its own seed."""
+    strategies = []
+    for sort_key in SORT_KEYS:
+        for pivot_order in PIVOT_ORDERS:
+            strategies.append({'sort_key': sort_key, 'pivot_order': pivot_order, 'seed': seed + len(strategies)})
+    return strategies
+
+
+def score_plan(plan: dict, items: List[Item]) -> tuple:
+    """Sort key for plans, lower is better: unfit items, bins used, then -utilization."""
+    used = [b for b in plan['bins'] if b['items']]
+    used_volume = sum(b['width'] * b['height'] * b['depth'] for b in used)
+    packed_volume = sum(items[p[0]].get_volume() for b in used for p in b['items'])
+    utilization = packed_volume / used_volume if used_volume > 0 else 0
+    return (len(plan['unfit']), len(used), -utilization)
+
+
+def _run_strategy(packer: Packer, strategy: dict, pack_options: dict) -> tuple:
+    # Runs in a worker process on its own copy of the packer
+    items = list(packer.items)
+    packer.pack(**pack_options, **strategy)
+    plan = packer.export_plan(items)
+    return score_plan(plan, items), plan
+
+
+def pack_portfolio(packer: Packer, strategies: Optional[List[dict]] = None, workers: Optional[int] = None,
+                   seed: int = 0, **pack_options) -> dict:
+    """Pack with several strategies in parallel and keep the best plan.
+
+    Each strategy is a dict of Packer.pack keyword arguments (sort_key,
+    pivot_order, seed, ...) applied on top of pack_options. The strategies run
+    on a ProcessPoolExecutor with `workers` processes (default: all cores,
+    1 runs them in this process). The winning plan is applied to packer, so
+    it ends up packed as if pack() had been called with that strategy. Ties
+    go to the earlier strategy, so a given seed always gives the same result.
+
+    Once a plan meets the lower bound, later strategies are skipped: pending
+    ones are cancelled and running ones are left to end in the background
+    without being waited for. Earlier ones still finish so the tie rule holds.
+
+    Returns a summary with the best strategy, its score, the lower bound, the
+    optimality gap and the score of every strategy that ran.
+    """
+    if strategies is None:
+        strategies = default_strategies(seed)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    items = list(packer.items)
+    bound = packer.compute_lower_bound()
+    optimal = (packer._unpackable, bound)
+
+    def meets_bound(score: tuple) -> bool:
+        return (score[0], score[1]) <= optimal
+
+    results = {}
+    if workers <= 1:
+        for k, s in enumerate(strategies):
+            results[k] = _run_strategy(copy.deepcopy(packer), s, pack_options)
+            if meets_bound(results[k][0]):
+                break
+    else:
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(strategies)))
+        try:
+            pending = {pool.submit(_run_strategy, packer, s, pack_options): k for k, s in enumerate(strategies)}
+            cutoff = len(strategies)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    k = pending.pop(future)
+                    results[k] = future.result()
+                    if meets_bound(results[k][0]):
+                        cutoff = min(cutoff, k)
+                # Strategies after an optimal one cannot win the tie-break
+                for future, k in list(pending.items()):
+                    if k > cutoff:
+                        future.cancel()
+                        del pending[future]
+        finally:
+            # Strategies past the cutoff may still be running (or already
+            # handed to a worker); return without waiting for them
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    best = min(results, key=lambda k: (results[k][0], k))
+    score, plan = results[best]
+    packer.apply_plan(plan, items)
+    return {
+        'strategy': strategies[best],
+        'score': score,
+        'lower_bound': bound,
+        'gap': packer.get_gap(),
+        'scores': [(strategies[k], results[k][0]) for k in sorted(results)],
+    }
@@ -0,0 +1,228 @@
+"""Local HTTP packing service. Standard library only, runs fully offline.
+
+    python service.py --port 8080 --workers 4 --queue-size 16
+
+POST /pack with a JSON body
+    {"items": [{"name": "Box", "w": 20, "h": 10, "d": 30, "qty": 4}],
+     "bins": [{"w": 120, "h": 80, "d": 80}],
+     "options": {"block_building": true}, "timeout": 10}
+Items and bins use the same columns as the app's file import. The reply is
+the plan in the format of cli.py (status 'ok'), or a partial plan with
+status 'timeout' (HTTP 504) when the search ran out of time. Requests
+beyond the worker and queue capacity are rejected at once with 503, orders
+of more than --max-units items in total with 400 before reaching a worker.
+
+GET /health reports whether the pool is up, GET /metrics the request
+counters and latencies.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+from cli import count_units, pack_order
+
+# Seconds a worker may overrun the deadline (to return its partial plan)
+# before the request is answered without it
+DEADLINE_GRACE = 2.0
+
+
+class PackService:
+    """A process pool behind a bounded admission counter, with request metrics.
+
+    At most workers + queue_size requests are admitted at once; the rest are
+    rejected, so a burst cannot pile up unbounded work.
+    """
+    def __init__(self, workers: int = 2, queue_size: int = 8, default_timeout: float = 30.0,
+                 max_timeout: float = 300.0, max_units: int = 100000):
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.default_timeout = default_timeout
+        self.max_timeout = max_timeout
+        self.max_units = max_units
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.started_at = time.time()
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.counts = {'requests': 0, 'ok': 0, 'bad_request': 0, 'rejected': 0, 'timeout': 0, 'failed': 0}
+        # Latencies of the most recent answered requests, for percentiles
+        self.latencies = deque(maxlen=1000)
+
+    def pack(self, order: dict) -> Tuple[int, dict]:
+        """Pack one request body; returns (HTTP status, response body)."""
+        self._count('requests')
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            return 503, {'status': 'rejected', 'error': "Queue full, retry later."}
+        started = time.time()
+        with self._lock:
+            self.in_flight += 1
+        future = None
+        try:
+            timeout = min(float(order.pop('timeout', self.default_timeout)), self.max_timeout)
+            options = order.pop('options', None) or {}
+            if not isinstance(options, dict):
+                raise ValueError("'options' must be an object")
+            # Quantities are expanded into items before any deadline applies
+            units = count_units(order.get('items') or [])
+            if units > self.max_units:
+                raise ValueError(f"Order has {units:,} items, over the limit of {self.max_units:,}")
+            # The deadline covers the time spent waiting for a worker too
+            future = self.pool.submit(pack_order, order, [], options, started + timeout)
+            try:
+                result = future.result(timeout=timeout + DEADLINE_GRACE)
+            except FutureTimeout:
+                future.cancel()
+                self._count('timeout')
+                return 504, {'order': order.get('order'), 'status': 'timeout',
+                             'error': f"No result within {timeout:g} s."}
+            status = {'ok': 200, 'timeout': 504}.get(result['status'], 400)
+            self._count({200: 'ok', 504: 'timeout'}.get(status, 'bad_request'))
+            return status, result
+        except (TypeError, ValueError) as e:
+            self._count('bad_request')
+            return 400, {'status': 'error', 'error': str(e)}
+        except Exception as e:
+            # Broken pool (a worker died) and the like
+            self._count('failed')
+            return 500, {'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+        finally:
+            with self._lock:
+                self.latencies.append(time.time() - started)
+            if future is None:
+                self._release()
+            else:
+                # A worker still running past the deadline keeps its slot
+                # until it is free again, so admission follows the real load
+                future.add_done_callback(lambda f: self._release())
+
+    def health(self) -> Tuple[int, dict]:
+        broken = getattr(self.pool, '_broken', False)
+        body = {'status': 'unavailable' if broken else 'ok', 'workers': self.workers,
+                'in_flight': self.in_flight, 'capacity': self.capacity}
+        return (503 if broken else 200), body
+
+    def metrics(self) -> dict:
+        with self._lock:
+            latencies = sorted(self.latencies)
+            counts = dict(self.counts)
+            in_flight = self.in_flight
+
+        def percentile(q: float) -> Optional[float]:
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else None
+
+        return {
+            'uptime': time.time() - self.started_at,
+            'workers': self.workers,
+            'capacity': self.capacity,
+            'in_flight': in_flight,
+            'queued': max(0, in_flight - self.workers),
+            'requests': counts,
+            'latency': {
+                'count': len(latencies),
+                'mean': sum(latencies) / len(latencies) if latencies else None,
+                'p50': percentile(0.5),
+                'p95': percentile(0.95),
+                'p99': percentile(0.99),
+                'max': latencies[-1] if latencies else None,
+            },
+        }
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+
+class PackRequestHandler(BaseHTTPRequestHandler):
+    service: PackService = None
+    max_body = 16 * 1024 * 1024
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._reply(*self.service.health())
+        elif self.path == '/metrics':
+            self._reply(200, self.service.metrics())
+        else:
+            self._reply(404, {'status': 'error', 'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/pack':
+            self._reply(404, {'status': 'error', 'error': f"Unknown path {self.path}"})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > self.max_body:
+            self._reply(413, {'status': 'error', 'error': f"Body over {self.max_body} bytes"})
+            return
+        try:
+            order = json.loads(self.rfile.read(length) or b'null')
+        except ValueError as e:
+            self._reply(400, {'status': 'error', 'error': f"Invalid JSON: {e}"})
+            return
+        if not isinstance(order, dict):
+            self._reply(400, {'status': 'error', 'error': "Body must be a JSON object with 'items' and 'bins'"})
+            return
+        self._reply(*self.service.pack(order))
+
+    def _reply(self, status: int, body: dict):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        if status == 503:
+            self.send_header('Retry-After', '1')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Quiet by default; request counts are in /metrics
+        pass
+
+
+def make_server(host: str, port: int, service: PackService) -> ThreadingHTTPServer:
+    handler = type('Handler', (PackRequestHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve Packer over HTTP on this machine.")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to bind (default: localhost only)")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=2, help="Worker processes")
+    parser.add_argument('--queue-size', type=int, default=8, help="Requests allowed to wait for a worker")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Default per-request timeout in seconds")
+    parser.add_argument('--max-timeout', type=float, default=300.0, help="Upper limit for a request's timeout")
+    parser.add_argument('--max-units', type=int, default=100000, help="Most items (summed quantities) per request")
+    args = parser.parse_args(argv)
+
+    service = PackService(args.workers, args.queue_size, args.timeout, args.max_timeout, args.max_units)
+    server = make_server(args.host, args.port, service)
+    print(f"Packing service on http://{args.host}:{args.port} "
+          f"({args.workers} workers, queue {args.queue_size})", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
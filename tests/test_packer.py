@@ -0,0 +1,235 @@
+import random
+
+import pytest
+
+from packer import Bin, BinType, ContactGraph, Item, Packer
+
+
+def make_items(seed: int, count: int, limits: bool = False):
+    rng = random.Random(seed)
+    items = []
+    for k in range(count):
+        max_load = rng.choice([0, 0, 40, 120]) if limits else 0
+        fragile = limits and rng.random() < 0.1
+        items.append(Item(f"i{k}", rng.randint(5, 30), rng.randint(5, 30), rng.randint(5, 30),
+                          rng.randint(1, 40), max_load, fragile))
+    return items
+
+
+def make_packer(seed: int = 0, count: int = 150, limits: bool = False, bins=None) -> Packer:
+    packer = Packer()
+    if bins is None:
+        packer.add_bin_type(BinType("T", 100, 80, 100))
+    else:
+        for bin in bins:
+            packer.add_bin(bin)
+    for item in make_items(seed, count, limits):
+        packer.add_item(item)
+    return packer
+
+
+def placements(packer: Packer):
+    return [[(i.name, tuple(i.position), i.rotation_type) for i in b.items] for b in packer.bins]
+
+
+def assert_valid(packer: Packer):
+    """Every item placed once or unfit, inside its bin, and no two items overlapping."""
+    placed = [i for b in packer.bins for i in b.items]
+    assert len(placed) + len(packer.unfit_items) == len(packer.items)
+    assert {id(i) for i in placed} | {id(i) for i in packer.unfit_items} == {id(i) for i in packer.items}
+    for b in packer.bins:
+        size = (b.width, b.height, b.depth)
+        for k, a in enumerate(b.items):
+            pa, da = a.position, a.get_dimension()
+            for axis in range(3):
+                assert -1e-9 <= pa[axis] and pa[axis] + da[axis] <= size[axis] + 1e-9
+            for c in b.items[k + 1:]:
+                pc, dc = c.position, c.get_dimension()
+                assert not all(pa[axis] < pc[axis] + dc[axis] - 1e-9 and pc[axis] < pa[axis] + da[axis] - 1e-9
+                               for axis in range(3)), (a.name, c.name)
+        assert b.used_volume == pytest.approx(sum(i.get_volume() for i in b.items))
+        assert b.total_weight == pytest.approx(sum(i.weight for i in b.items))
+
+
+def supported_share(bin: Bin, item: Item) -> float:
+    pos, dim = item.position, item.get_dimension()
+    if pos[1] <= 1e-9:
+        return 1.0
+    area = 0.0
+    for other in bin.items:
+        p, d = other.position, other.get_dimension()
+        if abs(p[1] + d[1] - pos[1]) <= 1e-9:
+            area += (max(0, min(pos[0] + dim[0], p[0] + d[0]) - max(pos[0], p[0]))
+                     * max(0, min(pos[2] + dim[2], p[2] + d[2]) - max(pos[2], p[2])))
+    return area / (dim[0] * dim[2])
+
+
+def bin_state(bin: Bin):
+    return (list(bin.items), [tuple(p) for p in bin.extreme_points], list(bin.extreme_points.max_extent),
+            bin.used_volume, bin.total_weight, bin.arrays.count)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_grid_index_matches_linear_scan(seed):
+    fast = make_packer(seed, bins=[Bin("A", 100, 80, 100), Bin("B", 90, 70, 90)])
+    slow = make_packer(seed, bins=[Bin("A", 100, 80, 100, use_index=False), Bin("B", 90, 70, 90, use_index=False)])
+    fast.pack()
+    slow.pack()
+    assert placements(fast) == placements(slow)
+    assert [i.name for i in fast.unfit_items] == [i.name for i in slow.unfit_items]
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_vectorized_matches_pivot_search(seed):
+    pivot = make_packer(seed)
+    batched = make_packer(seed)
+    pivot.pack()
+    batched.pack(vectorized=True)
+    assert placements(pivot) == placements(batched)
+    assert_valid(batched)
+
+
+@pytest.mark.parametrize('options', [{'block_building': True}, {'engine': 'heightmap'},
+                                     {'engine': 'heightmap', 'min_support': 0.9}, {'resolution': 0.5}])
+def test_engines_place_without_overlap(options):
+    packer = make_packer(3, count=200)
+    packer.pack(**options)
+    assert_valid(packer)
+    assert packer.unfit_items == []
+    if options.get('engine') == 'heightmap':
+        for b in packer.bins:
+            for item in b.items:
+                assert supported_share(b, item) >= options.get('min_support', 0.75) - 1e-9
+
+
+def test_block_building_keeps_identical_items_together():
+    packer = Packer()
+    packer.add_bin_type(BinType("T", 100, 80, 100))
+    for _ in range(60):
+        packer.add_item(Item("Box", 20, 10, 25))
+    packer.pack(block_building=True)
+    assert_valid(packer)
+    assert packer.get_bins_used() == 1
+
+
+@pytest.mark.parametrize('limits', [False, True])
+def test_pop_item_restores_bin_state(limits):
+    packer = make_packer(4, count=120, limits=limits)
+    packer.pack()
+    bin = max(packer.bins, key=lambda b: len(b.items))
+    # State after each prefix, rebuilt from scratch in a fresh bin
+    fresh = Bin(bin.name, bin.width, bin.height, bin.depth, bin.max_weight)
+    states = []
+    for item in list(bin.items):
+        fresh._add(item)
+        states.append(bin_state(fresh))
+    while len(bin.items) > 1:
+        bin.pop_item()
+        assert bin_state(bin) == states[len(bin.items) - 1]
+
+
+def test_pop_item_restores_loads():
+    packer = make_packer(5, count=120, limits=True)
+    packer.pack()
+    for bin in packer.bins:
+        if not bin.contacts.active:
+            continue
+        keep = max(1, len(bin.items) // 2)
+        while len(bin.items) > keep:
+            bin.pop_item()
+        # Loads left behind match a graph built from the remaining items
+        expected = ContactGraph(bin)
+        expected.track()
+        assert set(bin.contacts.load) == set(expected.load)
+        for key, load in expected.load.items():
+            assert bin.contacts.load[key] == pytest.approx(load)
+
+
+def test_load_limits_hold():
+    packer = make_packer(6, count=200, limits=True)
+    packer.pack()
+    assert_valid(packer)
+    for bin in packer.bins:
+        graph = ContactGraph(bin)
+        graph.track()
+        for item in bin.items:
+            if item.max_load > 0:
+                assert graph.load_on(item) <= item.max_load + 1e-6
+            if item.fragile:
+                assert graph.load_on(item) == 0
+
+
+def test_extreme_points_undo_round_trip():
+    bin = Bin("B", 50, 50, 50)
+    before = ([tuple(p) for p in bin.extreme_points], list(bin.extreme_points.max_extent))
+    item = Item("a", 10, 20, 30)
+    item.position = [0, 0, 0]
+    bin.items.append(item)
+    bin.index.insert(item)
+    journal = bin.extreme_points.update(item)
+    assert [tuple(p) for p in bin.extreme_points] != before[0]
+    bin.extreme_points.undo(journal)
+    assert ([tuple(p) for p in bin.extreme_points], list(bin.extreme_points.max_extent)) == before
+
+
+@pytest.mark.parametrize('options', [{}, {'vectorized': True}, {'engine': 'heightmap'}, {'block_building': True}])
+def test_incremental_updates(options):
+    packer = make_packer(7, count=150, limits=True)
+    packer.pack(**options)
+    before = {id(i): (tuple(i.position), i.rotation_type) for b in packer.bins for i in b.items}
+
+    added = make_items(8, 10)
+    report = packer.add_items(added)
+    assert_valid(packer)
+    assert len(report.placed) + len(report.unfit) == len(added)
+    assert report.moved == [] and report.removed == []
+    # Nothing placed before moved
+    assert all(before[id(i)] == (tuple(i.position), i.rotation_type) for b in packer.bins for i in b.items
+               if id(i) in before)
+
+    removed = packer.items[::7]
+    report = packer.remove_items(removed)
+    assert_valid(packer)
+    assert {id(i) for i in report.removed} == {id(i) for i in removed}
+    remaining = {id(i) for i in packer.items}
+    assert not any(id(i) in remaining for i in removed)
+    # Only the reported items changed place
+    moved = {id(i) for i in report.moved}
+    for b in packer.bins:
+        for i in b.items:
+            if id(i) in before and id(i) not in moved and i not in report.placed:
+                assert before[id(i)] == (tuple(i.position), i.rotation_type)
+
+
+def test_change_quantity():
+    packer = Packer()
+    packer.add_bin_type(BinType("T", 50, 50, 50))
+    for _ in range(5):
+        packer.add_item(Item("A", 20, 20, 20))
+    packer.pack()
+    packer.change_quantity("A", 9)
+    assert sum(i.name == "A" for i in packer.items) == 9
+    packer.change_quantity("A", 2)
+    assert sum(i.name == "A" for i in packer.items) == 2
+    assert_valid(packer)
+    with pytest.raises(KeyError):
+        packer.change_quantity("B", 1)
+    with pytest.raises(ValueError):
+        packer.change_quantity("A", -1)
+
+
+def test_add_items_uses_space_in_bins_closed_as_full():
+    packer = Packer()
+    packer.add_bin(Bin("B", 10, 10, 10))
+    packer.add_item(Item("big", 10, 6, 10))
+    packer.pack()
+    report = packer.add_items([Item("small", 2, 2, 2)])
+    assert [i.name for i in report.placed] == ["small"]
+    assert [b.name for b in packer.bins] == ["B"]
+
+
+def test_incremental_updates_refuse_resolution_mode():
+    packer = make_packer(9, count=20)
+    packer.pack(resolution=0.5)
+    with pytest.raises(ValueError):
+        packer.add_items([Item("x", 1, 1, 1)])
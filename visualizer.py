@@ -1,6 +1,6 @@
 import plotly.graph_objects as go
 import numpy as np
-from typing import List
+from typing import List, Optional
 from packer import Bin, Item
 
 # Vibrant color palette for items
@@ -61,8 +61,241 @@ def get_cube_wireframe(X, Y, Z, color='white'):
         showlegend=False
     )
 
-def visualize_bin(bin: Bin):
+# Above this many items visualize_bin switches to the batched traces
+BATCH_THRESHOLD = 100
+
+# Level-of-detail views draw box edges for at most this many boxes
+WIRE_LIMIT = 300
+
+# Unit cube corners, in the vertex order of get_cube_mesh
+CUBE_CORNERS = np.array([
+    [0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0],
+    [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1],
+], dtype=np.float64)
+
+# Two triangles per face, as corner indices (bottom, top, y=0, y=max, x=0, x=max)
+CUBE_TRIANGLES = np.array([
+    [0, 1, 2], [0, 2, 3],
+    [4, 6, 5], [4, 7, 6],
+    [0, 5, 1], [0, 4, 5],
+    [3, 2, 6], [3, 6, 7],
+    [0, 3, 7], [0, 7, 4],
+    [1, 5, 6], [1, 6, 2],
+])
+
+# Edge path of one box, same strokes as get_cube_wireframe; -1 breaks the line
+CUBE_EDGE_PATH = np.array([0, 1, 2, 3, 0, 4, 5, 6, 7, 4, -1, 1, 5, -1, 2, 6, -1, 3, 7, -1])
+
+
+def get_batched_traces(bin: Bin, opacity=0.7, wire_color='rgba(255, 255, 255, 0.4)'):
+    """All items of a bin as one Mesh3d and their edges as one Scatter3d.
+
+    Vertices come from the bin's placement arrays in one NumPy pass. Every
+    box has its own 8 vertices, so per-vertex hover text names the item under
+    the cursor; faces take the item's palette color.
+    """
+    positions = bin.arrays.positions
+    dims = bin.arrays.dims
+    labels = [f"{item.name}<br>{dx:.0f}×{dy:.0f}×{dz:.0f}" for item, (dx, dy, dz) in zip(bin.items, dims)]
+    return get_box_traces(positions, dims, item_colors(bin), labels, opacity=opacity, wire_color=wire_color)
+
+def get_box_traces(positions: np.ndarray, dims: np.ndarray, colors: np.ndarray, labels: List[str],
+                   opacity=0.7, wire_color='rgba(255, 255, 255, 0.4)', wireframe=True):
+    """Boxes given as (n, 3) position and size arrays as one Mesh3d (+ one edge Scatter3d).
+
+    colors holds a palette index per box, labels the hover text per box.
+    """
+    n = len(positions)
+
+    # (n, 8, 3) box corners, flattened to (8n, 3); float32 halves the binary
+    # arrays in the figure JSON
+    vertices = (positions[:, None, :] + CUBE_CORNERS[None, :, :] * dims[:, None, :]).reshape(-1, 3)
+    vertices = vertices.astype(np.float32)
+    triangles = (CUBE_TRIANGLES[None, :, :] + 8 * np.arange(n)[:, None, None]).reshape(-1, 3)
+    # Palette index per face, mapped through a stepped colorscale (one byte
+    # per face instead of a color string)
+    k = len(ITEM_COLORS)
+    face_colors = np.repeat(np.asarray(colors, dtype=np.uint8), len(CUBE_TRIANGLES))
+    colorscale = [[step / k, c] for i, c in enumerate(ITEM_COLORS) for step in (i, i + 1)]
+    hover = np.repeat(np.array(labels, dtype=object), 8)
+
+    mesh = go.Mesh3d(
+        x=vertices[:, 0], y=vertices[:, 1], z=vertices[:, 2],
+        i=triangles[:, 0], j=triangles[:, 1], k=triangles[:, 2],
+        intensity=face_colors,
+        intensitymode='cell',
+        colorscale=colorscale,
+        cmin=-0.5,
+        cmax=k - 0.5,
+        showscale=False,
+        opacity=opacity,
+        flatshading=True,
+        name=f"{n} items",
+        hoverinfo='text',
+        hovertext=hover,
+    )
+    if not wireframe:
+        return (mesh,)
+
+    # Gather the edge paths of all boxes; NaN rows separate the strokes
+    path = (CUBE_EDGE_PATH[None, :] + 8 * np.arange(n)[:, None]).reshape(-1)
+    edges = vertices[np.where(path < 0, 0, path)]
+    edges[np.tile(CUBE_EDGE_PATH < 0, n)] = np.nan
+    wire = go.Scatter3d(
+        x=edges[:, 0], y=edges[:, 1], z=edges[:, 2],
+        mode='lines',
+        line=dict(color=wire_color, width=1.5),
+        hoverinfo='none',
+        showlegend=False
+    )
+    return mesh, wire
+
+def item_colors(bin: Bin, by: str = 'index') -> np.ndarray:
+    """Palette index per item: by placement order ('index') or one color per item name ('name')."""
+    if by == 'name':
+        first_seen = {}
+        return np.array([first_seen.setdefault(item.name, len(first_seen)) % len(ITEM_COLORS)
+                         for item in bin.items], dtype=np.int64)
+    return np.arange(len(bin.items)) % len(ITEM_COLORS)
+
+def enclosed_items(positions: np.ndarray, dims: np.ndarray, chunk_size: int = 512) -> np.ndarray:
+    """Mask of boxes whose six faces are all fully covered by touching boxes.
+
+    Packed boxes do not overlap, so the parts of a face shared with boxes
+    lying against it are disjoint, and the face is covered exactly when
+    their areas add up to the face area. Bin walls do not count as cover,
+    since the figure shows the bin as a wireframe.
+    """
+    n = len(positions)
+    lo = positions
+    hi = positions + dims
+    eps = 1e-9 * max(1.0, float(np.abs(hi).max()) if n else 1.0)
+    covered = np.ones(n, dtype=bool)
+    for axis in range(3):
+        u, v = [a for a in range(3) if a != axis]
+        for start in range(0, n, chunk_size):
+            rows = slice(start, start + chunk_size)
+            # (rows, n) area shared on the u/v plane by each pair of boxes
+            shared_u = np.minimum.outer(hi[rows, u], hi[:, u]) - np.maximum.outer(lo[rows, u], lo[:, u])
+            shared_v = np.minimum.outer(hi[rows, v], hi[:, v]) - np.maximum.outer(lo[rows, v], lo[:, v])
+            shared = np.clip(shared_u, 0, None) * np.clip(shared_v, 0, None)
+            face = dims[rows, u] * dims[rows, v]
+            # Far face (touching the next box's near side), then near face
+            for mine, theirs in ((hi, lo), (lo, hi)):
+                touching = np.abs(np.subtract.outer(mine[rows, axis], theirs[:, axis])) <= eps
+                covered[rows] &= (shared * touching).sum(axis=1) >= face * (1 - 1e-9)
+    return covered
+
+def merge_boxes(positions: np.ndarray, dims: np.ndarray, colors: np.ndarray) -> tuple:
+    """Merge same-colored boxes that meet face to face with the same cross-section.
+
+    One pass along each axis. Merged boxes cover exactly the union of their
+    parts. Returns (positions, dims, colors, counts, first): counts is the
+    number of input boxes in each result box, first the index of one of them.
+    """
+    boxes = [(list(p), list(p + d), int(c), 1, k) for k, (p, d, c) in enumerate(zip(positions, dims, colors))]
+    for axis in range(3):
+        u, v = [a for a in range(3) if a != axis]
+        boxes.sort(key=lambda b: (b[2], b[0][u], b[0][v], b[1][u], b[1][v], b[0][axis]))
+        merged = []
+        for lo, hi, color, count, first in boxes:
+            if merged:
+                last_lo, last_hi, last_color, last_count, last_first = merged[-1]
+                if (last_color == color and last_hi[axis] == lo[axis]
+                        and last_lo[u] == lo[u] and last_lo[v] == lo[v]
+                        and last_hi[u] == hi[u] and last_hi[v] == hi[v]):
+                    last_hi[axis] = hi[axis]
+                    merged[-1] = (last_lo, last_hi, color, last_count + count, last_first)
+                    continue
+            merged.append((list(lo), list(hi), color, count, first))
+        boxes = merged
+
+    lo = np.array([b[0] for b in boxes], dtype=np.float64).reshape(-1, 3)
+    hi = np.array([b[1] for b in boxes], dtype=np.float64).reshape(-1, 3)
+    return (lo, hi - lo, np.array([b[2] for b in boxes], dtype=np.int64),
+            np.array([b[3] for b in boxes], dtype=np.int64), np.array([b[4] for b in boxes], dtype=np.int64))
+
+def get_lod_traces(bin: Bin, merge=False, color_by='index', max_wire_items=WIRE_LIMIT,
+                   opacity=0.7, wire_color='rgba(255, 255, 255, 0.4)') -> tuple:
+    """Level-of-detail traces of a bin: enclosed items left out, optional merging, capped edges.
+
+    Items whose six faces all touch other items cannot be seen and are not
+    drawn. With merge, same-colored neighbours become one box (color_by='name'
+    gives one color per item name, so identical cartons merge). Edges are
+    only drawn for up to max_wire_items boxes. Returns (traces, hidden count).
+    """
+    positions = bin.arrays.positions
+    dims = bin.arrays.dims
+    colors = item_colors(bin, color_by)
+    visible = ~enclosed_items(positions, dims)
+    hidden = int(len(visible) - visible.sum())
+    positions, dims, colors = positions[visible], dims[visible], colors[visible]
+    items = [item for item, keep in zip(bin.items, visible) if keep]
+    if not items:
+        return (), hidden
+
+    if merge:
+        positions, dims, colors, counts, first = merge_boxes(positions, dims, colors)
+    else:
+        counts = np.ones(len(items), dtype=np.int64)
+        first = np.arange(len(items))
+    labels = []
+    for n, k, (dx, dy, dz) in zip(counts, first, dims):
+        if n == 1:
+            title = items[k].name
+        elif color_by == 'name':
+            title = f"{items[k].name} ×{n}"
+        else:
+            title = f"{n} items"
+        labels.append(f"{title}<br>{dx:.0f}×{dy:.0f}×{dz:.0f}")
+
+    traces = get_box_traces(positions, dims, colors, labels, opacity=opacity, wire_color=wire_color,
+                            wireframe=len(positions) <= max_wire_items)
+    return traces, hidden
+
+# Thumbnail gradient from empty floor to full height (app theme colors)
+THUMBNAIL_COLORS = np.array([[26, 31, 58], [108, 99, 255], [0, 210, 255]], dtype=np.float64)
+
+def bin_thumbnail(bin: Bin, size: int = 48) -> np.ndarray:
+    """Top-down height map of a bin as a small RGB image (uint8, rows along depth).
+
+    Each pixel shows the top of the highest item over it, dark for an empty
+    floor and bright for a stack reaching the bin top. Cheap enough to draw
+    for every bin where a 3D figure would not be.
+    """
+    W, H, D = bin.width, bin.height, bin.depth
+    scale = size / max(W, D)
+    cols, rows = max(1, int(round(W * scale))), max(1, int(round(D * scale)))
+    top = np.zeros((rows, cols))
+    if bin.items:
+        positions = bin.arrays.positions
+        dims = bin.arrays.dims
+        # Pixel centres along width (x) and depth (z), tested against every footprint
+        cx = (np.arange(cols) + 0.5) * W / cols
+        cz = (np.arange(rows) + 0.5) * D / rows
+        in_x = (positions[:, 0, None] <= cx) & (cx < positions[:, 0, None] + dims[:, 0, None])  # (n, cols)
+        in_z = (positions[:, 2, None] <= cz) & (cz < positions[:, 2, None] + dims[:, 2, None])  # (n, rows)
+        heights = (positions[:, 1] + dims[:, 1])[:, None, None]
+        top = np.where(in_z[:, :, None] & in_x[:, None, :], heights, 0).max(axis=0) / H if H > 0 else top
+    # Piecewise linear gradient through THUMBNAIL_COLORS
+    t = np.clip(top, 0, 1) * (len(THUMBNAIL_COLORS) - 1)
+    lower = np.minimum(t.astype(int), len(THUMBNAIL_COLORS) - 2)
+    frac = (t - lower)[:, :, None]
+    image = THUMBNAIL_COLORS[lower] * (1 - frac) + THUMBNAIL_COLORS[lower + 1] * frac
+    return image.astype(np.uint8)
+
+def visualize_bin(bin: Bin, batched: Optional[bool] = None, lod: bool = False, merge: bool = False,
+                  color_by: str = 'index', max_wire_items: int = WIRE_LIMIT):
+    """3D figure of a packed bin.
+
+    batched=True draws all items as two traces (see get_batched_traces),
+    False as two traces per item with a legend entry each; by default large
+    bins (over BATCH_THRESHOLD items) are batched. lod=True draws the reduced
+    view of get_lod_traces instead; lod=False (the default) shows everything.
+    """
     fig = go.Figure()
+    if batched is None:
+        batched = len(bin.items) > BATCH_THRESHOLD
     
     W, H, D = bin.width, bin.height, bin.depth
     
@@ -77,7 +310,16 @@ def visualize_bin(bin: Bin):
     fig.add_trace(bin_wire)
     
     # Draw packed items with distinct colors
-    for idx, item in enumerate(bin.items):
+    if lod and bin.items:
+        traces, hidden = get_lod_traces(bin, merge=merge, color_by=color_by, max_wire_items=max_wire_items)
+        fig.add_traces(traces)
+        if hidden:
+            fig.add_annotation(text=f"{hidden} enclosed items hidden", xref='paper', yref='paper',
+                               x=0, y=1, showarrow=False, xanchor='left', font=dict(color='#7A8599'))
+        batched = True
+    elif batched and bin.items:
+        fig.add_traces(get_batched_traces(bin))
+    for idx, item in enumerate([] if batched else bin.items):
         color = ITEM_COLORS[idx % len(ITEM_COLORS)]
         mesh, X, Y, Z = get_cube_mesh(item, color=color, opacity=0.7)
         # Slightly brighter wireframe for edge definition